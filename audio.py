@@ -1,90 +1,58 @@
 import os
-import re
-import subprocess
 import threading
 import time
-import srt
-import yt_dlp
-import requests
-import json
 import traceback
-from datetime import timedelta
 from kivy.properties import StringProperty, ListProperty, BooleanProperty, NumericProperty
-from faster_whisper import WhisperModel
-from google import genai
+from search_index import TranscriptIndex
+from segment_store import load_transcript
+from uz_normalize import normalize_uz
+from subtitle_timeline import SubtitleTimeline
+from word_index import WordIndex, WORD_TIMESTAMPS, words_path_for
+from gemini_refine import RefineCache, gemini_generate_fn
+from gemini_summary import SummaryCache, summarize_transcript
+from transcript_cache import TranscriptCache
+from transcript_library import LIBRARY_DIR, TranscriptLibrary, find_media_for
+from youtube_ingest import download_audio_first
+from parallel_transcribe import DEFAULT_WORKERS, DEFAULT_CHUNK_SEC, shutdown_pool, use_worker_main
+from pipeline import GEMINI_MODEL, Pipeline, sec_to_hhmmss
+from progress import StageProgress, ytdlp_hook
+from job_scheduler import JobCancelled, JobScheduler, PRIORITY_BACKGROUND, PRIORITY_OPEN, QUEUED, RUNNING
 from dotenv import load_dotenv
 
 # .env faylini yuklash
 load_dotenv()
 
+# Bir vaqtda ishlaydigan transkripsiyalar soni (qolganlari navbatda kutadi)
+TRANSCRIBE_JOBS = int(os.getenv("TRANSCRIBE_JOBS", "1"))
+
 
 # ---------- yordamchi funksiyalar ----------
-def sec_to_hhmmss(sec: float) -> str:
-    sec = max(0.0, float(sec))
-    h = int(sec // 3600)
-    m = int((sec % 3600) // 60)
-    s_ = int(sec % 60)
-    return f"{h:02d}:{m:02d}:{s_:02d}"
+def make_result_rows(items, highlight: bool = False, max_chars: int = 100):
+    """
+    RecycleView uchun qator ma'lumotlari: (start, end, text) -> dict.
+    """
+    return [
+        {"text": f"[{sec_to_hhmmss(st)}] {txt[:max_chars]}", "start": float(st), "highlight": highlight,
+         "video": "", "srt": ""}
+        for (st, en, txt) in items
+    ]
 
 
-def run_ffmpeg_extract_audio(video_path: str, wav_path: str):
+def make_library_rows(hits, max_chars: int = 200):
     """
-    Videodan WAV audio chiqarish (16kHz mono) - transkripsiya uchun qulay.
+    Arxiv qidiruvi natijalari: bosilganda o'sha video ochiladi va vaqtga o'tiladi.
     """
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", video_path,
-        "-vn",
-        "-ac", "1",
-        "-ar", "16000",
-        "-c:a", "pcm_s16le",
-        wav_path
+    return [
+        {"text": f"{os.path.basename(os.path.splitext(hit.srt_path)[0])} [{sec_to_hhmmss(hit.start)}] "
+                 f"{hit.text[:max_chars]}",
+         "start": float(hit.start), "highlight": True, "video": hit.video_path, "srt": hit.srt_path}
+        for hit in hits
     ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
-    if p.returncode != 0:
-        raise RuntimeError("FFmpeg xatolik:\n" + (p.stderr[-2000:] if p.stderr else "Unknown error"))
-
-
-def make_srt_from_segments(segments, srt_path: str):
-    subs = []
-    i = 1
-    for seg in segments:
-        start = float(seg.start)
-        end = float(seg.end)
-        text = (seg.text or "").strip()
-        if not text:
-            continue
-        subs.append(
-            srt.Subtitle(
-                index=i,
-                start=timedelta(seconds=start),
-                end=timedelta(seconds=end),
-                content=text
-            )
-        )
-        i += 1
-    data = srt.compose(subs)
-    with open(srt_path, "w", encoding="utf-8") as f:
-        f.write(data)
-
-
-def load_srt_items(srt_path: str):
-    with open(srt_path, "r", encoding="utf-8", errors="ignore") as f:
-        data = f.read()
-    subs = list(srt.parse(data))
-    items = []
-    for sub in subs:
-        start_sec = sub.start.total_seconds()
-        end_sec = sub.end.total_seconds()
-        txt = sub.content.replace("\n", " ").strip()
-        items.append((start_sec, end_sec, txt))
-    return items
 
 
 def normalize_text(s: str) -> str:
-    s = (s or "").lower().strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    # kichik harf + kirill/lotin + apostrof variantlari + tinish belgilari (uz_normalize)
+    return normalize_uz(s)
 
 
 # ---------- Asosiy App ----------
@@ -213,6 +181,22 @@ KV = """
             size: self.size
             radius: [8]
 
+<ResultRow@Button>:
+    start: 0.0
+    highlight: False
+    video: ''
+    srt: ''
+    background_normal: ''
+    background_color: app.accent_color[:3] + [0.4] if self.highlight else app.secondary_bg[:3] + [0.8]
+    color: app.fg_color
+    halign: 'left'
+    valign: 'middle'
+    padding: [10, 5]
+    shorten: True
+    shorten_from: 'right'
+    text_size: self.width - dp(20), self.height
+    on_release: app.root.open_library_hit(self.video, self.srt, self.start) if self.srt else app.root.seek_to(self.start)
+
 <MainLayout>:
     id: main_layout
     orientation: 'vertical'
@@ -340,6 +324,27 @@ KV = """
                             size: self.size
                             radius: [20]
                 
+                # Transkripsiya navbati: holat va bekor qilish
+                BoxLayout:
+                    size_hint_y: None
+                    height: '30dp' if root.jobs_text else 0
+                    opacity: 1 if root.jobs_text else 0
+                    spacing: '10dp'
+                    Label:
+                        text: root.jobs_text
+                        font_size: '12sp'
+                        color: app.fg_color
+                        halign: 'left'
+                        valign: 'middle'
+                        text_size: self.size
+                        shorten: True
+                    HoverButton:
+                        text: 'BEKOR'
+                        font_size: '11sp'
+                        size_hint_x: None
+                        width: '80dp'
+                        on_release: root.cancel_jobs()
+
                 Label:
                     id: subtitle_label
                     text: ''
@@ -403,6 +408,9 @@ KV = """
                     SearchModeBtn:
                         text: 'Exact'
                         on_release: root.match_mode = 'exact'
+                    SearchModeBtn:
+                        text: 'Fuzzy'
+                        on_release: root.match_mode = 'fuzzy'
 
                 BoxLayout:
                     size_hint_y: None
@@ -430,16 +438,24 @@ KV = """
                         text: 'CLEAR SEARCH'
                         font_size: '11sp'
                         on_release: search_input.text = ''; root._load_srt_items_into_ui()
+                    HoverButton:
+                        text: 'ARXIV: ' + ('ON' if root.search_library else 'OFF')
+                        font_size: '11sp'
+                        on_release: root.search_library = not root.search_library
 
-                ScrollView:
+                # Faqat ko'rinib turgan qatorlar widget sifatida yaratiladi
+                RecycleView:
+                    id: results_view
+                    viewclass: 'ResultRow'
                     bar_width: '4dp'
                     scroll_type: ['bars', 'content']
-                    GridLayout:
-                        id: results_container
-                        cols: 1
+                    RecycleBoxLayout:
+                        orientation: 'vertical'
+                        default_size: None, dp(50)
+                        default_size_hint: 1, None
                         size_hint_y: None
                         height: self.minimum_height
-                        spacing: '8dp'
+                        spacing: dp(8)
                         padding: [0, 5]
 
 
@@ -447,20 +463,11 @@ KV = """
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.video import Video
 from kivy.uix.popup import Popup
-from kivy.uix.progressbar import ProgressBar
-from kivy.uix.spinner import Spinner
 from kivy.clock import Clock
-from kivy.graphics import Color, Rectangle, RoundedRectangle, Line, Ellipse
-from kivy.core.window import Window
 from kivy.lang import Builder
-from kivy.properties import StringProperty, ListProperty, BooleanProperty
 
 class MainLayout(BoxLayout):
     status_text = StringProperty("Holat: tayyor")
@@ -469,17 +476,41 @@ class MainLayout(BoxLayout):
     match_mode = StringProperty("contains")
     whisper_model = StringProperty("small")
     current_lang = StringProperty("auto")
+    progressive = BooleanProperty(True)
+    whisper_workers = NumericProperty(DEFAULT_WORKERS)
+    chunk_sec = NumericProperty(DEFAULT_CHUNK_SEC)
+    word_timestamps = BooleanProperty(WORD_TIMESTAMPS)
     pulse_val = NumericProperty(1.0)
+    jobs_text = StringProperty("")
+    search_library = BooleanProperty(False)  # qidiruv barcha videolar arxivi bo'yicha
     
     def __init__(self, **kwargs):
         super(MainLayout, self).__init__(**kwargs)
         self.video_path = ""
-        self.audio_path = ""
+        self.media_path = ""  # STT manbai, bo'sh bo'lsa video_path (YouTube: alohida audio fayl)
         self.srt_path = ""
         self.srt_items = []
+        self.search_index = TranscriptIndex()
+        self.timeline = SubtitleTimeline()
+        self.word_index = None
         self._last_matches = []
-        Clock.schedule_interval(self.update_video_time, 0.5)
+        self.transcript_cache = TranscriptCache()
+        self.refine_cache = RefineCache()
+        self.summary_cache = SummaryCache()
+        self.library = TranscriptLibrary()
+        self._active_sub = None
+        self._shown_sec = None
+        # ro'yxatda butun transkript (True) yoki qidiruv natijalari (False)
+        self._showing_all = True
+        self.jobs = JobScheduler(workers=TRANSCRIBE_JOBS, on_change=self._on_jobs_changed)
+        self._downloads = []  # fonda yuklanayotgan videolar (StageProgress)
+        # to'xtab qolgan ishlarni ko'rsatish uchun navbat holati vaqti-vaqti bilan yangilanadi
+        Clock.schedule_interval(lambda dt: self._on_jobs_changed(self.jobs), 2.0)
+        # Subtitr video pozitsiyasi o'zgarganda yangilanadi (har kadrda), taymer kerak emas
+        self.ids.video_player.bind(position=self.update_video_time, duration=self.update_video_time)
         Clock.schedule_interval(self.animate_pulse, 0.05)
+        # oldin yuklangan videolar transkriptlari arxivga qo'shiladi (o'zgarmaganlari o'tkazib yuboriladi)
+        threading.Thread(target=self._scan_library, daemon=True).start()
 
     def animate_pulse(self, dt):
         import math
@@ -527,12 +558,13 @@ class MainLayout(BoxLayout):
         def on_select(instance):
             if fc.selection:
                 self.video_path = fc.selection[0]
-                self.audio_path = os.path.splitext(self.video_path)[0] + "_audio.wav"
+                self.media_path = ""
                 self.srt_path = os.path.splitext(self.video_path)[0] + ".srt"
                 self.ids.video_player.source = self.video_path
                 self.ids.video_player.state = 'play'
                 self.set_status(f"Holat: video yuklandi -> {os.path.basename(self.video_path)}")
                 popup.dismiss()
+                self._prioritize_open_video()
                 self._try_load_existing_srt()
         btn_select = Button(text='Tanlash')
         btn_select.bind(on_release=on_select)
@@ -542,19 +574,24 @@ class MainLayout(BoxLayout):
         content.add_widget(btn_layout)
         popup.open()
 
-    def update_video_time(self, dt):
+    def update_video_time(self, *args):
         vp = self.ids.video_player
         if vp.duration > 0:
-            self.ids.time_label.text = f"{sec_to_hhmmss(vp.position)} / {sec_to_hhmmss(vp.duration)}"
-            
-            # Subtitlerlarni yangilash
             current_pos = vp.position
-            sub_text = ""
-            for st, en, txt in self.srt_items:
-                if st <= current_pos <= en:
-                    sub_text = txt
-                    break
-            self.ids.subtitle_label.text = sub_text
+            sec = (int(current_pos), int(vp.duration))
+            if sec != self._shown_sec:
+                self._shown_sec = sec
+                self.ids.time_label.text = f"{sec_to_hhmmss(current_pos)} / {sec_to_hhmmss(vp.duration)}"
+            
+            # Subtitlerlarni yangilash: faqat faol segment almashganda
+            idx = self.timeline.lookup(current_pos)
+            if idx != self._active_sub:
+                self._active_sub = idx
+                self.ids.subtitle_label.text = self.srt_items[idx][2] if 0 <= idx < len(self.srt_items) else ""
+
+    def _set_timeline(self, timeline):
+        self.timeline = timeline
+        self._active_sub = None
 
     def download_and_process(self, url):
         url = url.strip()
@@ -564,221 +601,309 @@ class MainLayout(BoxLayout):
         if not os.path.exists("downloads"):
             os.makedirs("downloads")
         def task():
+            video_progress = StageProgress("Video", unit="B")
+
+            def drop_video_progress():
+                # xato bo'lsa ham qator jarayonlar ro'yxatida osilib qolmasin
+                if video_progress in self._downloads:
+                    self._downloads.remove(video_progress)
+                    self._on_jobs_changed(self.jobs)
+
             try:
-                self.set_status("Holat: Video yuklanmoqda...")
-                ydl_opts = {
-                    'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                    'outtmpl': 'downloads/%(title)s.%(ext)s',
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    video_path = ydl.prepare_filename(info)
-                self.video_path = video_path
-                self.audio_path = os.path.splitext(video_path)[0] + "_audio.wav"
-                self.srt_path = os.path.splitext(video_path)[0] + ".srt"
+                self.set_status("Holat: Audio yuklanmoqda (video fonda)...")
+
+                audio_progress = StageProgress("Yuklash (audio)", unit="B",
+                                               on_update=lambda p: self.set_status("Holat: " + p.format()))
+                self._downloads.append(video_progress)
+
+                downloaded = {}
+
                 def _load_video(dt):
-                    self.ids.video_player.source = self.video_path
+                    # video audiodan oldin ham tushishi mumkin; foydalanuvchi bu orada boshqa
+                    # video ochgan bo'lsa, pleyer almashtirilmaydi
+                    video_path = downloaded.get("video")
+                    if not video_path or self.srt_path != os.path.splitext(video_path)[0] + ".srt":
+                        return
+                    if not os.path.exists(video_path):
+                        return
+                    if self.ids.video_player.source == video_path:
+                        return
+                    self.video_path = video_path
+                    self.ids.video_player.source = video_path
                     self.ids.video_player.state = 'play'
-                Clock.schedule_once(_load_video)
+
+                def on_video(video_path):
+                    drop_video_progress()
+                    downloaded["video"] = video_path
+                    Clock.schedule_once(_load_video)
+
+                def on_video_error(e):
+                    drop_video_progress()
+                    self.set_status(f"Xato (video): {str(e)}")
+
+                # Transkripsiya audio oqimi tushishi bilan boshlanadi, video ijro uchun keyin ulanadi
+                audio_path, base_path, _ = download_audio_first(url, on_video=on_video, on_video_error=on_video_error,
+                                                                audio_hooks=[ytdlp_hook(audio_progress)],
+                                                                video_hooks=[ytdlp_hook(video_progress)])
+                self.media_path = audio_path
+                self.srt_path = base_path + ".srt"
+                # yangi transkript subtitrlari eski video ustida ko'rinmasin, natijalar unga sakramasin
+                self.video_path = ""
+                def _switch(dt):
+                    vp = self.ids.video_player
+                    vp.state = 'stop'
+                    vp.source = ""
+                    vp.duration = -1
+                    _load_video(dt)
+                Clock.schedule_once(_switch)
                 self.make_subtitles_thread()
             except Exception as e:
+                # extract_info / audio yuklash xatosi - video threadi boshlanmagan bo'lishi mumkin
+                drop_video_progress()
                 self.set_status(f"Xato: {str(e)}")
         threading.Thread(target=task, daemon=True).start()
 
     def make_subtitles_thread(self):
-        threading.Thread(target=self.make_subtitles, daemon=True).start()
+        # Har bosishda yangi thread emas - navbatga qo'yiladi (bir xil ish ikki marta ishlamaydi)
+        self.make_subtitles()
 
     def make_subtitles(self):
-        self.set_status("Holat: Subtitre ajratish jarayoni ishga tushdi...")
-        threading.Thread(target=self._actual_transcription, daemon=True).start()
+        source, srt_path = self._stt_source(), self.srt_path
+        if not source:
+            self.set_status("Xato: avval video tanlang")
+            return
+        pipeline = self._pipeline()
+        key = (source, pipeline.provider, pipeline.whisper_model, pipeline.language)
+        job = self.jobs.submit(key, lambda job: self._actual_transcription(job, pipeline, source, srt_path),
+                               priority=PRIORITY_OPEN, label=os.path.basename(srt_path))
+        self._prioritize_open_video()
+        if job.state == QUEUED:
+            self.set_status("Holat: Subtitre ajratish navbatga qo'yildi...")
 
-    def _actual_transcription(self):
-        try:
-            self.set_status("Holat: Audio tayyorlanmoqda (FFmpeg)...")
-            run_ffmpeg_extract_audio(self.video_path, self.audio_path)
-            
-            self.set_status("Holat: Matnga o'girish jarayoni (AI)...")
-            provider = self.stt_provider
-            subs = []
-            
-            if provider == "muxlisa":
-                file_size = os.path.getsize(self.audio_path)
-                if file_size > 5 * 1024 * 1024:
-                    subs = self.transcribe_with_muxlisa_async()
-                else:
-                    subs = self.transcribe_with_muxlisa_api()
+    def _prioritize_open_video(self):
+        # Ochiq video navbatda oldinga o'tadi, qolganlari fon ishiga aylanadi
+        source = self._stt_source()
+        for job in self.jobs.jobs():
+            if job.state == QUEUED:
+                self.jobs.set_priority(job.key, PRIORITY_OPEN if job.key[0] == source else PRIORITY_BACKGROUND)
+
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
+        self.set_status("Holat: transkripsiya bekor qilindi")
+
+    def _on_jobs_changed(self, scheduler):
+        jobs = scheduler.jobs()
+        running = []
+        for j in jobs:
+            if j.state != RUNNING:
+                continue
+            progress = j.progress
+            if progress is None:
+                running.append(j.label)
             else:
-                self.set_status(f"Holat: Whisper ({self.whisper_model}) tahlil...")
-                model_name = self.whisper_model
-                model = WhisperModel(model_name, device="cpu", compute_type="int8")
-                lang = self.current_lang
-                language = None if lang == "auto" else lang
-                segments, info = model.transcribe(self.audio_path, language=language, beam_size=5, vad_filter=True)
-                for i, seg in enumerate(segments, 1):
-                    subs.append(srt.Subtitle(
-                        index=i, 
-                        start=timedelta(seconds=seg.start), 
-                        end=timedelta(seconds=seg.end), 
-                        content=seg.text.strip()
-                    ))
-
-                # AI REFINEMENT
-                subs = self.refine_subtitles_with_gemini(subs)
-
-            if subs:
-                with open(self.srt_path, "w", encoding="utf-8") as f:
-                    f.write(srt.compose(subs))
-                
+                # uzoq vaqt yangilanmagan bosqich darhol ko'rinadi
+                stalled = " (to'xtab qoldimi?)" if progress.stalled() else ""
+                running.append(f"{j.label} - {progress.format()}{stalled}")
+        queued = sum(1 for j in jobs if j.state == QUEUED)
+        parts = []
+        if running or queued:
+            parts.append(f"Ishlayapti: {', '.join(running) or '-'}")
+        if queued:
+            parts.append(f"navbatda: {queued}")
+        parts += [p.format() for p in list(self._downloads)]
+        text = "  |  ".join(parts)
+        def _set(dt):
+            self.jobs_text = text
+        Clock.schedule_once(_set)
+
+    def _pipeline(self):
+        # GUI sozlamalari bilan konveyer; keshlar va Muxlisa sessiyasi ishga tushirishlar orasida umumiy
+        return Pipeline(provider=self.stt_provider, whisper_model=self.whisper_model, language=self.current_lang,
+                        workers=int(self.whisper_workers), chunk_sec=float(self.chunk_sec),
+                        word_timestamps=self.word_timestamps, progressive=self.progressive,
+                        transcript_cache=self.transcript_cache, refine_cache=self.refine_cache,
+                        library=self.library,
+                        muxlisa=self._muxlisa_client() if self.stt_provider == "muxlisa" else None,
+                        on_status=self.set_status)
+
+    def _actual_transcription(self, job, pipeline, source, srt_path):
+        def is_open():
+            # foydalanuvchi boshqa videoga o'tgan bo'lsa, UI ga tegmaymiz
+            return srt_path == self.srt_path
+        def on_status(text):
+            if is_open():
+                self.set_status(text)
+        def on_segment(item):
+            if is_open():
+                self._on_segment(item)
+        def on_progress(progress):
+            job.progress = progress
+            self._on_jobs_changed(self.jobs)
+        pipeline.on_status = on_status
+        pipeline.on_progress = on_progress
+        try:
+            progressive = self.progressive and pipeline.provider != "muxlisa"
+            if progressive and is_open():
+                # Segmentlar kelishi bilan ro'yxatga chiqadi va qidiruvga qo'shiladi
+                self._reset_results()
+            result = pipeline.process(source, srt_path, on_segment=on_segment if progressive else None, job=job)
+            if not is_open():
+                return result
+            if result["cached"] or result["segments"]:
                 # AUTOMATICALLY LOAD INTO UI
                 self._load_srt_into_ui()
-                self.set_status(f"Holat: tayyor ✅ ({os.path.basename(self.srt_path)})")
+            if result["cached"]:
+                self.set_status(f"Holat: keshdan yuklandi ✅ ({os.path.basename(srt_path)})")
+            elif result["segments"]:
+                self.set_status(f"Holat: tayyor ✅ ({os.path.basename(srt_path)})")
+            return result
                 
+        except JobCancelled:
+            on_status(f"Holat: bekor qilindi ({os.path.basename(srt_path)})")
+            raise
         except Exception as e:
-            import traceback
             print(traceback.format_exc())
-            self.set_status(f"Xato: {str(e)}")
+            on_status(f"Xato: {str(e)}")
+            raise
 
-    def refine_subtitles_with_gemini(self, subs):
-        try:
-            self.set_status("Holat: AI tahlil...")
-            # Limit to 50 segments to avoid 400 error/too long prompt
-            chunk = subs[:50]
-            raw_text = "\n".join([f"{i}|{s.content}" for i, s in enumerate(chunk)])
-            
-            client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-            prompt = (
-                "Quyidagi qatorlarni grammatik tuzatib ber. "
-                "Faqat 'index|matn' formatida qaytar. Segmentlarni o'zgartirma.\n\n" + raw_text
-            )
-            
-            response = client.models.generate_content(
-                model='gemini-2.0-flash', 
-                contents=prompt
-            )
-            
-            if response and response.text:
-                lines = response.text.strip().split("\n")
-                for line in lines:
-                    if "|" in line:
-                        parts = line.split("|", 1)
-                        if len(parts) == 2:
-                            try:
-                                idx = int(parts[0].strip())
-                                if 0 <= idx < len(subs):
-                                    subs[idx].content = parts[1].strip()
-                            except: pass
-            self.set_status("Holat: AI tahlili yakunlandi")
-        except Exception as e:
-            print(f"DEBUG: Gemini refinement error: {e}")
-            self.set_status(f"Faqat original matn qoldi (Gemini xatosi)")
-        return subs
-
-    def transcribe_with_muxlisa_api(self):
-        url = "https://service.muxlisa.uz/api/v2/stt"
-        api_key = os.getenv("MUXLISA_API_KEY")
-        headers = {"x-api-key": api_key}
-        with open(self.audio_path, "rb") as f:
-            files = {"audio": (os.path.basename(self.audio_path), f, "audio/wav")}
-            response = requests.post(url, headers=headers, files=files)
-        if response.status_code == 200:
-            data = response.json()
-            segments = data.get("result", {}).get("segments", [])
-            subs = []
-            for i, segment in enumerate(segments, 1):
-                subs.append(srt.Subtitle(
-                    index=i,
-                    start=timedelta(seconds=float(segment["start"])),
-                    end=timedelta(seconds=float(segment["end"])),
-                    content=segment["text"].strip()
-                ))
-            return subs
-        else:
-            raise Exception(f"Muxlisa API xatosi: {response.status_code}")
-
-    def transcribe_with_muxlisa_async(self):
-        upload_url = "https://service.muxlisa.uz/api/v1/async/stt"
-        api_key = os.getenv("MUXLISA_API_KEY")
-        headers = {"x-api-key": api_key}
-        with open(self.audio_path, "rb") as f:
-            files = {"audio": (os.path.basename(self.audio_path), f, "audio/wav")}
-            response = requests.post(upload_url, headers=headers, files=files)
-        if response.status_code != 200:
-            raise Exception(f"Muxlisa Async Upload xatosi: {response.status_code}")
-        data = response.json()
-        task_id = data.get("task_id") or data.get("id")
-        status_url = f"https://service.muxlisa.uz/api/v1/async/stt/status/{task_id}"
-        for i in range(300):
-            self.set_status(f"Holat: Muxlisa tahlil ({i+1})...")
-            try:
-                status_resp = requests.get(status_url, headers=headers)
-                if status_resp.status_code == 200:
-                    status_data = status_resp.json()
-                    if status_data.get("status") == "completed":
-                        result = status_data.get("result", {})
-                        segments = result.get("segments", [])
-                        if not segments:
-                            segments = [{"start": 0, "end": 10, "text": result.get("text", "")}]
-                        subs = []
-                        for idx, segment in enumerate(segments, 1):
-                            subs.append(srt.Subtitle(
-                                index=idx,
-                                start=timedelta(seconds=float(segment.get("start", 0))),
-                                end=timedelta(seconds=float(segment.get("end", 5))),
-                                content=segment.get("text", "").strip()
-                            ))
-                        return subs
-                    elif status_data.get("status") == "failed":
-                        raise Exception("Muxlisa Async tahlili muvaffaqiyatsiz.")
-            except: pass
-            time.sleep(5)
-        raise Exception("Muxlisa Async kutish muddati tugadi.")
+    def _stt_source(self):
+        return self.media_path or self.video_path
+
+    def _load_cached_transcript(self):
+        if not self._pipeline().load_cached(self._stt_source(), self.srt_path):
+            return False
+        self._load_srt_into_ui()
+        self.set_status(f"Holat: keshdan yuklandi ✅ ({os.path.basename(self.srt_path)})")
+        return True
+
+    def _reset_results(self):
+        self.srt_items = []
+        self.search_index = TranscriptIndex()
+        self.word_index = None
+        def reset(dt):
+            self.ids.results_view.data = []
+            self._showing_all = True
+            self._set_timeline(SubtitleTimeline())
+        Clock.schedule_once(reset)
+
+    def _on_segment(self, item):
+        self.srt_items.append(item)
+        self.search_index.add(len(self.srt_items) - 1, item[2])
+        self._append_items_to_ui([item], len(self.srt_items) - 1)
+        self.set_status(f"Holat: Whisper tahlil... {sec_to_hhmmss(item[1])}")
+
+    def _append_items_to_ui(self, items, first_id):
+        rows = make_result_rows(items)
+        def add(dt):
+            for i, (st, en, txt) in enumerate(items):
+                self.timeline.append(st, en, first_id + i)
+            self._active_sub = None
+            # qidiruv natijalari ko'rsatilayotgan bo'lsa, ularga mos kelmaydigan segmentlar
+            # qo'shilmaydi; qidiruv tozalanganda butun ro'yxat srt_items dan qayta chiqadi
+            if self._showing_all:
+                self.ids.results_view.data.extend(rows)
+        Clock.schedule_once(add)
+
+    def _muxlisa_client(self):
+        # Bitta session - ulanishlar (TLS) har so'rovda qayta ochilmaydi
+        if getattr(self, "_muxlisa", None) is None:
+            from muxlisa_client import MuxlisaClient
+            self._muxlisa = MuxlisaClient()
+            self._muxlisa.on_upload = self._on_muxlisa_upload
+        return self._muxlisa
+
+    def _on_muxlisa_upload(self, sent, seconds):
+        mb = sent / (1024 * 1024)
+        self.set_status(f"Holat: Muxlisa yuklash {mb:.1f} MB ({mb / max(seconds, 1e-3):.1f} MB/s)...")
 
     def _try_load_existing_srt(self):
         if self.srt_path and os.path.exists(self.srt_path):
             self._load_srt_into_ui()
+        elif self.video_path:
+            # Nomi o'zgargan / nusxalangan video: keshdan qidiramiz
+            try:
+                self._load_cached_transcript()
+            except Exception as e:
+                print(f"DEBUG: Transcript cache error: {e}")
 
-    def _load_srt_into_ui(self):
+    def _load_srt_into_ui(self, show: bool = True):
         if not self.srt_path or not os.path.exists(self.srt_path):
             return
         try:
-            self.srt_items = load_srt_items(self.srt_path)
+            # yonidagi .segments.bin mmap orqali ochiladi (SRT parse qilinmaydi, indeks tayyor)
+            items, index = load_transcript(self.srt_path)
+            self._add_to_library(items)
+            self.search_index = index
+            self.word_index = self._load_word_index(len(items))
+            timeline = SubtitleTimeline(items)
+            self.srt_items = items
+            rows = make_result_rows(items)
             def fill(dt):
-                self.ids.results_container.clear_widgets()
-                for (st, en, txt) in self.srt_items:
-                    btn = Button(text=f"[{sec_to_hhmmss(st)}] {txt[:70]}...", size_hint_y=None, height=45,
-                                background_normal='', background_color=App.get_running_app().secondary_bg[:3] + [0.8], color=App.get_running_app().fg_color)
-                    self.ids.results_container.add_widget(btn)
+                self._set_timeline(timeline)
+                if show:
+                    self.ids.results_view.data = rows
+                    self._showing_all = True
             Clock.schedule_once(fill)
+        except Exception:
+            self.set_status("Xato: SRT o'qishda xatolik")
+
+    def _add_to_library(self, items):
+        try:
+            if not self.library.is_current(self.srt_path):
+                self.library.add(self.srt_path, items, find_media_for(self.srt_path, self.video_path))
+        except Exception as e:
+            print(f"DEBUG: Library ingest error: {e}")
+
+    def _scan_library(self):
+        if not os.path.isdir(LIBRARY_DIR):
+            return
+        try:
+            added, removed = self.library.scan(LIBRARY_DIR)
+            print(f"DEBUG: Library scan +{added} -{removed} {self.library.stats()}")
         except Exception as e:
-            self.set_status(f"Xato: SRT o'qishda xatolik")
+            print(f"DEBUG: Library scan error: {e}")
+
+    def _load_word_index(self, n_segments):
+        path = words_path_for(self.srt_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            words = WordIndex.load(path)
+        except Exception as e:
+            print(f"DEBUG: Word index error: {e}")
+            return None
+        # SRT qo'lda o'zgartirilgan bo'lsa, so'z vaqtlari mos kelmaydi
+        return words if words.n_segments == n_segments else None
+
+    def _match_time(self, seg_id, query):
+        # So'z vaqtlari bo'lsa - aniq so'z, bo'lmasa segment boshi
+        st = self.srt_items[seg_id][0]
+        if self.word_index is not None:
+            t = self.word_index.find_word_time(seg_id, query, self.match_mode)
+            if t is not None:
+                return t
+        return st
 
     def search_now(self):
         query_text = self.ids.search_input.text.strip()
         query = normalize_text(query_text)
+        if self.search_library and query:
+            self.search_library_now(query_text)
+            return
         
         if not query or not self.srt_items:
             self._load_srt_items_into_ui() # Full list
             return
         
-        matches = []
-        for (st, en, txt) in self.srt_items:
-            if query in normalize_text(txt):
-                matches.append((st, en, txt))
-                
-        self.ids.results_container.clear_widgets()
-        for (st, en, txt) in matches:
-            btn = Button(
-                text=f"[{sec_to_hhmmss(st)}] {txt}", 
-                size_hint_y=None, 
-                height=60,
-                background_normal='', 
-                background_color=App.get_running_app().accent_color[:3] + [0.4], 
-                color=App.get_running_app().fg_color,
-                halign='left', valign='middle', padding=(10, 5)
-            )
-            btn.bind(width=lambda inst, val: setattr(inst, 'text_size', (val * 0.9, None)))
-            self.ids.results_container.add_widget(btn)
-            
+        # Teskari indeks: 'contains' - barcha so'zlar, 'exact' - aniq ibora,
+        # 'fuzzy' - xatoli yozuvlar ham, eng o'xshashi birinchi
+        seg_ids = self.search_index.search(query, mode=self.match_mode)
+        matches = [(self._match_time(i, query),) + tuple(self.srt_items[i][1:]) for i in seg_ids]
+
+        # Faqat ma'lumot manbasi almashadi, widgetlar qayta ishlatiladi
+        self.ids.results_view.data = make_result_rows(matches, highlight=True, max_chars=200)
+        self._showing_all = False
+
         if matches:
             self.set_status(f"Topildi: {len(matches)} ta natija")
             # Birinchi topilgan joyga sakrab o'tish
@@ -786,8 +911,47 @@ class MainLayout(BoxLayout):
         else:
             self.set_status(f"'{query_text}' topilmadi")
 
+    def search_library_now(self, query_text):
+        # Arxivda taxminiy qidiruv yo'q - "fuzzy" rejimida so'zlar prefiks bo'yicha qidiriladi
+        mode = "exact" if self.match_mode == "exact" else "contains"
+        t0 = time.perf_counter()
+        hits = self.library.search(query_text, mode=mode)
+        ms = (time.perf_counter() - t0) * 1000
+        self.ids.results_view.data = make_library_rows(hits)
+        self._showing_all = False
+        if hits:
+            videos = len({hit.srt_path for hit in hits})
+            self.set_status(f"Arxiv: {len(hits)} ta natija, {videos} ta video ({ms:.0f} ms)")
+        else:
+            self.set_status(f"'{query_text}' arxivda topilmadi")
+
+    def open_library_hit(self, video_path, srt_path, seconds):
+        # video keyin yuklangan bo'lishi mumkin (YouTube: avval audio) - SRT yonidan qayta qidiramiz
+        video_path = find_media_for(srt_path, video_path)
+        if not video_path or not os.path.exists(video_path):
+            self.set_status(f"Xato: video topilmadi ({os.path.basename(srt_path)})")
+            return
+        if video_path != self.video_path:
+            self.video_path = video_path
+            self.media_path = ""
+            self.srt_path = srt_path
+            vp = self.ids.video_player
+            # seek_to eski videoning davomiyligi bilan sakramasligi uchun
+            vp.duration = -1
+            vp.source = video_path
+            vp.state = 'play'
+            self.set_status(f"Holat: video yuklandi -> {os.path.basename(video_path)}")
+            self._prioritize_open_video()
+            # arxiv natijalari ro'yxatda qoladi, boshqa natijaga ham o'tish mumkin
+            self._load_srt_into_ui(show=False)
+        self.seek_to(seconds)
+
     def seek_to(self, seconds):
         vp = self.ids.video_player
+        if not vp.source:
+            # YouTube: transkripsiya audio bilan boshlangan, video hali yuklanmoqda
+            self.set_status(f"Holat: video hali yuklanmagan ({sec_to_hhmmss(seconds)})")
+            return
         dur = vp.duration
         print(f"DEBUG: Seek request: {seconds}s, Duration: {dur}s")
         
@@ -814,28 +978,24 @@ class MainLayout(BoxLayout):
 
     def _load_srt_items_into_ui(self):
         # Helper to load all items (similar to _load_srt_into_ui but without file check)
-        self.ids.results_container.clear_widgets()
-        for (st, en, txt) in self.srt_items:
-            btn = Button(text=f"[{sec_to_hhmmss(st)}] {txt[:100]}", size_hint_y=None, height=50,
-                        background_normal='', background_color=App.get_running_app().secondary_bg[:3] + [0.7], 
-                        color=App.get_running_app().fg_color)
-            self.ids.results_container.add_widget(btn)
+        self.ids.results_view.data = make_result_rows(self.srt_items)
+        self._showing_all = True
 
     def summarize_with_gemini(self):
         if not self.srt_items:
             return
-        full_text = " ".join([item[2] for item in self.srt_items])
+        items = list(self.srt_items)
         def task():
             try:
                 self.set_status("Holat: Gemini xulosa...")
-                client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-                response = client.models.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=f"Quyidagi matnni o'zbek tilida qisqacha xulosa qilib ber:\n\n{full_text}"
+                # Uzun videolar vaqt oynalari bo'yicha parallel xulosa qilinib, so'ng birlashtiriladi
+                summary = summarize_transcript(
+                    items, gemini_generate_fn(GEMINI_MODEL), cache=self.summary_cache, model=GEMINI_MODEL,
+                    on_progress=lambda stage: self.set_status(f"Holat: Gemini xulosa ({stage})...")
                 )
                 content = BoxLayout(orientation='vertical', padding=10, spacing=10)
                 app = App.get_running_app()
-                txt = TextInput(text=response.text, readonly=True, background_color=app.bg_color, foreground_color=app.fg_color)
+                txt = TextInput(text=summary, readonly=True, background_color=app.bg_color, foreground_color=app.fg_color)
                 content.add_widget(txt)
                 btn = Button(text="Yopish", size_hint_y=None, height=40, background_color=app.accent_color)
                 popup = Popup(title='Gemini Xulosasi', content=content, size_hint=(0.8, 0.8),
@@ -860,6 +1020,13 @@ class IVSPApp(App):
         Builder.load_string(KV)
         return MainLayout()
 
+    def on_stop(self):
+        # navbatdagi transkripsiyalar bekor qilinadi, Whisper worker jarayonlari yopiladi
+        self.root.jobs.shutdown()
+        shutdown_pool(wait=False)
+
 if __name__ == "__main__":
+    # Whisper workerlari (spawn) bu skriptni va Kivy ni qayta import qilmasin
+    use_worker_main()
     app = IVSPApp()
     app.run()
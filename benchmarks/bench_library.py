@@ -0,0 +1,80 @@
+"""
+Transkriptlar arxivi (SQLite FTS5): minglab videoni qo'shish va butun arxiv
+bo'yicha qidiruv vaqti.
+
+    python benchmarks/bench_library.py --videos 2000 --segments 500
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_library import TranscriptLibrary
+
+
+SYLLABLES = ("ba", "ki", "to", "o'", "zbe", "kis", "ta", "ri", "xo", "ja", "li", "gi", "da", "rs", "us", "mak",
+             "tab", "qish", "loq", "sha", "har", "yo'l", "ma", "shi", "na")
+VOCAB_SIZE = 20000
+
+
+def make_vocab(rng, size=VOCAB_SIZE):
+    vocab = set()
+    while len(vocab) < size:
+        vocab.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    vocab = sorted(vocab)
+    rng.shuffle(vocab)
+    return vocab
+
+
+def synthetic_items(n, rng, vocab, cum_weights):
+    # so'zlar chastotasi Zipf qonuni bo'yicha (tabiiy nutqdagidek), segmentda 10 so'z
+    return [(i * 4.0, i * 4.0 + 3.5, " ".join(rng.choices(vocab, cum_weights=cum_weights, k=10))) for i in range(n)]
+
+
+def make_queries(vocab):
+    # eng ko'p uchraydigan so'zdan (eng yomon holat) kam uchraydiganigacha, ikki so'zli so'rovlar ham
+    return [vocab[0], vocab[10], vocab[100], vocab[1000], vocab[10000],
+            f"{vocab[10]} {vocab[50]}", f"{vocab[100]} {vocab[300]}"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--videos", type=int, default=2000)
+    ap.add_argument("--segments", type=int, default=500, help="bitta videodagi segmentlar")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    vocab = make_vocab(rng)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocab))))
+    with tempfile.TemporaryDirectory() as tmp:
+        library = TranscriptLibrary(os.path.join(tmp, "library.sqlite3"))
+        t0 = time.perf_counter()
+        for v in range(args.videos):
+            library.add(os.path.join(tmp, f"video{v}.srt"), synthetic_items(args.segments, rng, vocab, weights),
+                        os.path.join(tmp, f"video{v}.mp4"))
+        ingest = time.perf_counter() - t0
+        stats = library.stats()
+        print(f"qo'shish: {stats['videos']} video, {stats['segments']} segment, {ingest:.1f} s "
+              f"({stats['segments'] / ingest:.0f} segment/s), fts={stats['fts']}")
+
+        for mode in ("contains", "exact"):
+            for query in make_queries(vocab):
+                times = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    hits = library.search(query, mode=mode)
+                    times.append((time.perf_counter() - t0) * 1000)
+                print(f"{mode:8s} {query!r:24s} {len(hits):4d} natija  mediana {statistics.median(times):7.2f} ms  "
+                      f"max {max(times):7.2f} ms")
+        library.close()
+
+
+if __name__ == "__main__":
+    main()
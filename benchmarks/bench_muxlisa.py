@@ -0,0 +1,55 @@
+"""
+Muxlisa asinxron vazifalarini kutish: tugash kechikishi va so'rovlar soni
+(lokal soxta server bilan). Eski usul - har 5 soniyada bitta GET.
+
+    python benchmarks/bench_muxlisa.py --jobs 20 --job-sec 7
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_muxlisa import start_fake_muxlisa
+from muxlisa_client import MuxlisaClient
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=20)
+    ap.add_argument("--job-sec", type=float, default=7.0)
+    ap.add_argument("--no-hints", action="store_true")
+    args = ap.parse_args()
+
+    server, url = start_fake_muxlisa(job_sec=args.job_sec, hints=not args.no_hints)
+    client = MuxlisaClient(api_key="fake", base_url=url)
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        f.write(b"\0" * 32000 * 30)
+        audio_path = f.name
+    try:
+        t0 = time.perf_counter()
+        task_ids = [client.submit_async(audio_path) for _ in range(args.jobs)]
+        results = client.wait_many(task_ids)
+        dt = time.perf_counter() - t0
+    finally:
+        os.remove(audio_path)
+        server.shutdown()
+
+    ok = sum(1 for r in results.values() if not isinstance(r, Exception))
+    status_requests = server.counts.get("status", 0)
+    old_polls = math.ceil(args.job_sec / 5.0)
+    print(f"{args.jobs} vazifa, har biri {args.job_sec:.1f} s: tugadi={ok}, umumiy vaqt={dt:.2f} s, "
+          f"holat so'rovlari={status_requests} ({status_requests / args.jobs:.1f} / vazifa)")
+    print(f"eski usul (ketma-ket, 5 s interval): ~{old_polls * 5.0 * args.jobs:.0f} s, "
+          f"{old_polls} holat so'rovi / vazifa")
+    sent, seconds, mbps = client.last_upload
+    print(f"yuklash (oxirgi): {sent / 1e6:.2f} MB, {seconds * 1000:.1f} ms, {mbps:.1f} MB/s, "
+          f"serverga jami {server.upload_bytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
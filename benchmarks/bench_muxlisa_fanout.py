@@ -0,0 +1,76 @@
+"""
+Katta audio Muxlisa'ga: sinxron endpointga parallel <=5 MB bo'laklar
+(fan-out) va bitta asinxron vazifa (lokal soxta server bilan).
+Sinxron javob vaqti hajmga proporsional, asinxron navbat esa --job-sec.
+
+    python benchmarks/bench_muxlisa_fanout.py --minutes 60 --concurrency 4 --fail-rate 0.3 --codec opus
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_muxlisa import start_fake_muxlisa
+from ffmpeg_audio import SAMPLE_RATE
+from muxlisa_client import UPLOAD_CODEC, MuxlisaClient, split_for_sync
+
+
+def synthetic_speech(minutes: float, sample_rate: int = SAMPLE_RATE, seed: int = 0):
+    # 3-8 soniyalik "gaplar" va ular orasida 0.3-1 soniyalik sukunat
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = int(minutes * 60 * sample_rate)
+    n = 0
+    while n < total:
+        speech = rng.normal(0, 0.2, int(rng.uniform(3, 8) * sample_rate)).astype(np.float32)
+        pause = rng.normal(0, 0.002, int(rng.uniform(0.3, 1.0) * sample_rate)).astype(np.float32)
+        parts += [speech, pause]
+        n += len(speech) + len(pause)
+    return np.concatenate(parts)[:total]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=60.0)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--sync-sec-per-mb", type=float, default=0.5)
+    ap.add_argument("--job-sec", type=float, default=300.0, help="asinxron navbat vaqti (taqqoslash uchun)")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--codec", choices=["flac", "opus", "wav"], default=UPLOAD_CODEC,
+                    help="bo'laklar kodeki (wav - ffmpeg kerak emas)")
+    args = ap.parse_args()
+
+    audio = synthetic_speech(args.minutes)
+    t0 = time.perf_counter()
+    chunks = split_for_sync(audio)
+    split_dt = time.perf_counter() - t0
+    longest = max(b - a for a, b in chunks) / SAMPLE_RATE
+    print(f"{args.minutes:.0f} daqiqa audio: {len(chunks)} bo'lak, eng uzuni {longest:.0f} s, "
+          f"bo'lish {split_dt:.2f} s")
+
+    server, url = start_fake_muxlisa(sync_latency=0.1, sync_sec_per_mb=args.sync_sec_per_mb,
+                                     fail_rate=args.fail_rate)
+    # qayta urinishlar faqat _post_audio ichida (503 -> shu bo'lak qayta yuboriladi)
+    client = MuxlisaClient(api_key="fake", base_url=url)
+    try:
+        t0 = time.perf_counter()
+        segments = client.transcribe_fanout(audio, concurrency=args.concurrency, codec=args.codec)
+        dt = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+
+    ordered = all(a["start"] <= b["start"] for a, b in zip(segments, segments[1:]))
+    print(f"fan-out (concurrency={args.concurrency}): {dt:.2f} s, {len(segments)} segment, "
+          f"oxirgi segment {segments[-1]['end']:.0f} s, tartib={'ok' if ordered else 'BUZILGAN'}")
+    print(f"sinxron so'rovlar={server.counts.get('sync', 0)}, xato (qayta yuborilgan)={server.counts.get('sync_failed', 0)}, "
+          f"yuklangan {server.upload_bytes / 1e6:.1f} MB ({args.codec})")
+    sequential = 0.1 * len(chunks) + args.sync_sec_per_mb * server.upload_bytes / (1024 * 1024)
+    print(f"ketma-ket sinxron: ~{sequential:.1f} s, asinxron navbat: ~{args.job_sec:.0f} s + yuklash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Gemini tuzatish vaqti transkript uzunligiga qarab (lokal soxta server bilan).
+
+    python benchmarks/bench_refine.py --segments 100 1000 5000 --latency 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_gemini import start_fake_gemini
+from gemini_refine import gemini_generate_fn, refine_lines
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--segments", type=int, nargs="+", default=[100, 1000, 5000])
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--fail-rate", type=float, default=0.1)
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    server, url = start_fake_gemini(latency=args.latency, fail_rate=args.fail_rate)
+    generate = gemini_generate_fn(api_key="fake", base_url=url)
+
+    for n in args.segments:
+        lines = [(i, f"bugun biz kitob o'qish haqida gaplashamiz {i}") for i in range(n)]
+        server.requests = 0
+        t0 = time.perf_counter()
+        refined, failed = refine_lines(lines, generate, concurrency=args.concurrency)
+        dt = time.perf_counter() - t0
+        print(f"{n:6d} segment: {dt:6.2f} s, so'rovlar={server.requests}, tuzatildi={len(refined)}, qoldi={failed}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Natijalar ro'yxatini to'ldirish tezligi: RecycleView (virtual) va eski
+GridLayout + har segmentga Button usuli.
+
+    python benchmarks/bench_results_list.py --rows 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.properties import BooleanProperty, NumericProperty, StringProperty
+from kivy.uix.button import Button
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+
+from audio import make_result_rows
+
+
+class BenchRow(Button):
+    start = NumericProperty(0)
+    highlight = BooleanProperty(False)
+    video = StringProperty("")
+    srt = StringProperty("")
+
+
+def synthetic_items(n):
+    return [(i * 4.0, i * 4.0 + 3.5, f"segment {i} bugun biz kitob o'qish haqida gaplashamiz") for i in range(n)]
+
+
+def bench_recycleview(items, height=800):
+    rv = RecycleView(size_hint=(None, None), size=(480, height))
+    layout = RecycleBoxLayout(orientation="vertical", default_size=(None, 50), default_size_hint=(1, None),
+                              size_hint_y=None)
+    layout.bind(minimum_height=layout.setter("height"))
+    rv.add_widget(layout)
+    rv.viewclass = BenchRow
+
+    t0 = time.perf_counter()
+    rows = make_result_rows(items)
+    t1 = time.perf_counter()
+    rv.data = rows
+    rv.refresh_views()
+    t2 = time.perf_counter()
+
+    # qidiruv: faqat ma'lumot manbasi almashadi
+    rv.data = make_result_rows(items[::10], highlight=True)
+    rv.refresh_views()
+    t3 = time.perf_counter()
+    return {
+        "rows_build_s": t1 - t0,
+        "fill_s": t2 - t1,
+        "swap_s": t3 - t2,
+        "widgets": len(layout.children),
+    }
+
+
+def bench_legacy(items):
+    grid = GridLayout(cols=1, size_hint_y=None)
+    t0 = time.perf_counter()
+    for (st, en, txt) in items:
+        grid.add_widget(Button(text=txt[:100], size_hint_y=None, height=50))
+    t1 = time.perf_counter()
+    return {"fill_s": t1 - t0, "widgets": len(grid.children)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--legacy-rows", type=int, default=5000,
+                    help="eski usul juda sekin, shuning uchun kichikroq son bilan o'lchanadi (0 - o'tkazib yuborish)")
+    args = ap.parse_args()
+
+    items = synthetic_items(args.rows)
+    r = bench_recycleview(items)
+    print(f"RecycleView {args.rows} qator: rows={r['rows_build_s'] * 1000:.1f} ms, "
+          f"fill={r['fill_s'] * 1000:.1f} ms, swap={r['swap_s'] * 1000:.1f} ms, widgetlar={r['widgets']}")
+
+    if args.legacy_rows:
+        legacy = bench_legacy(items[:args.legacy_rows])
+        per_row = legacy["fill_s"] / args.legacy_rows
+        print(f"GridLayout+Button {args.legacy_rows} qator: fill={legacy['fill_s'] * 1000:.1f} ms "
+              f"(~{per_row * args.rows:.1f} s {args.rows} qator uchun), widgetlar={legacy['widgets']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Transkriptni ochish: SRT (srt.parse + indeks qurish) va mmap qilingan
+.segments.bin. Har bir usul alohida jarayonda o'lchanadi (RSS toza bo'lishi uchun).
+
+    python benchmarks/bench_segment_store.py --hours 10
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ("bugun biz kitob o'qish haqida gaplashamiz tarix o'zbekiston maktab bilim dars ustoz talaba "
+         "iqtisod qishloq xo'jaligi suv daryo shahar yo'l mashina ish vaqt oila bola kelajak").split()
+
+CHILD = r"""
+import os, sys, time
+sys.path.insert(0, {root!r})
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return float("nan")
+from segment_store import SegmentStore, load_transcript, segments_path_for
+from pipeline import load_srt_items
+from search_index import TranscriptIndex
+before = rss_mb()
+t0 = time.perf_counter()
+if {mode!r} == "srt":
+    items = load_srt_items({srt!r})
+    index = TranscriptIndex.from_items(items)
+else:
+    items, index = load_transcript({srt!r})
+    assert isinstance(items, SegmentStore)
+t1 = time.perf_counter()
+first = items[len(items) // 2]
+hits = index.search("kitob")
+t2 = time.perf_counter()
+print(f"{{(t1 - t0) * 1000:.1f}} {{(t2 - t1) * 1000:.1f}} {{rss_mb() - before:.1f}} {{len(hits)}}")
+"""
+
+
+def write_srt(path, hours, rng):
+    import srt
+    n = int(hours * 3600 / 3)
+    subs = [srt.Subtitle(i + 1, timedelta(seconds=i * 3), timedelta(seconds=i * 3 + 2.5),
+                         " ".join(rng.choice(WORDS) for _ in range(10))) for i in range(n)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(srt.compose(subs))
+    return n
+
+
+def run(mode, srt_path):
+    code = CHILD.format(root=ROOT, mode=mode, srt=srt_path)
+    out = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True).stdout
+    load_ms, search_ms, rss, hits = out.split()
+    return float(load_ms), float(search_ms), float(rss), int(hits)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, default=10.0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srt_path = os.path.join(tmp, "long.srt")
+        n = write_srt(srt_path, args.hours, random.Random(0))
+
+        from segment_store import load_transcript, segments_path_for
+        t0 = time.perf_counter()
+        load_transcript(srt_path)
+        print(f"{args.hours:g} soat, {n} segment: SRT {os.path.getsize(srt_path) / 2**20:.1f} MB, "
+              f".segments.bin {os.path.getsize(segments_path_for(srt_path)) / 2**20:.1f} MB "
+              f"(birinchi ochishda yozish {time.perf_counter() - t0:.2f} s)")
+        for mode in ("srt", "mmap"):
+            load_ms, search_ms, rss, hits = run(mode, srt_path)
+            print(f"{mode:5s} ochish {load_ms:8.1f} ms  birinchi qidiruv {search_ms:6.1f} ms ({hits} natija)  "
+                  f"RSS +{rss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Dastur ochilishidagi import vaqti (python -X importtime asosida).
+Og'ir kutubxonalar (faster_whisper, google.genai, yt_dlp, ...) ochilishda
+import qilinmasligi kerak - import qilinsa yoki umumiy vaqt chegaradan
+oshsa, skript 1 kodi bilan chiqadi (CI/cron da regressiya tekshiruvi).
+
+    python benchmarks/bench_startup.py                  # audio.py (Kivy kerak)
+    python benchmarks/bench_startup.py --module pipeline --max-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ochilishda yuklanmasligi kerak bo'lgan modullar (birinchi ishlatilganda import qilinadi)
+LAZY_MODULES = ("faster_whisper", "ctranslate2", "google.genai", "yt_dlp", "requests", "urllib3")
+
+
+def import_profile(module: str, python: str = sys.executable):
+    """
+    Bitta yangi jarayonda `import module`: {modul: (self_us, cumulative_us)}.
+    """
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1")
+    p = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if p.returncode != 0:
+        raise RuntimeError(f"import {module} xato:\n" + p.stderr[-2000:])
+    profile = {}
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cum_us))
+    return profile
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--module", default="audio")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, default=1500.0, help="import vaqti chegarasi (mediana)")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    totals = [run[args.module][1] / 1000.0 for run in runs]
+    median = statistics.median(totals)
+    last = runs[-1]
+
+    print(f"import {args.module}: mediana {median:.0f} ms (min {min(totals):.0f}, max {max(totals):.0f}), "
+          f"{len(last)} modul")
+    print("eng og'ir (cumulative):")
+    for name, (self_us, cum_us) in sorted(last.items(), key=lambda kv: -kv[1][1])[1:args.top + 1]:
+        print(f"  {cum_us / 1000.0:8.1f} ms  {name}")
+
+    eager = sorted(name for name in last if any(name == m or name.startswith(m + ".") for m in LAZY_MODULES))
+    ok = True
+    if eager:
+        ok = False
+        print("XATO: ochilishda import qilingan og'ir modullar: " + ", ".join(eager[:10]))
+    if median > args.max_ms:
+        ok = False
+        print(f"XATO: {median:.0f} ms > chegara {args.max_ms:.0f} ms")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
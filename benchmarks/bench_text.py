@@ -0,0 +1,205 @@
+"""
+Matn bilan ishlaydigan issiq yo'llar uchun mikrobenchmarklar: 1 / 10 / 100 soatlik
+sintetik transkriptlarda load_srt_items, make_srt_from_segments, normalize_text,
+search_now ichidagi qidiruv, update_video_time dagi faol subtitr qidiruvi va sec_to_hhmmss.
+
+Har bir ishga tushirish natijasi benchmarks/results/bench_text.jsonl ga qo'shiladi;
+--compare berilsa, shu kompyuterdagi oldingi natijadan --max-regression martadan
+sekinlashgan benchmarklar chiqariladi va skript 1 kodi bilan tugaydi.
+
+    python benchmarks/bench_text.py                        # 1h, 10h, 100h
+    python benchmarks/bench_text.py --hours 1 10 --compare --max-regression 1.3
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_transcribe import Segment
+from pipeline import load_srt_items, make_srt_from_segments, sec_to_hhmmss
+from search_index import TranscriptIndex
+from segment_store import load_transcript
+from subtitle_timeline import SubtitleTimeline
+from uz_normalize import normalize_uz
+
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "bench_text.jsonl")
+SEGMENT_SEC = 3.0
+WORDS_PER_SEGMENT = 10
+MIN_TIME = 0.2  # bitta o'lchov kamida shuncha davom etadi (kichik funksiyalar bir necha marta chaqiriladi)
+
+LATIN = ("bugun biz kitob o'qish haqida gaplashamiz tarix o'zbekiston maktab bilim dars ustoz talaba "
+         "iqtisod qishloq xo'jaligi suv daryo shahar yo'l mashina ish vaqt oila bola kelajak g'alaba").split()
+CYRILLIC = "бугун биз китоб ўқиш ҳақида гаплашамиз тарих Ўзбекистон мактаб билим дарс устоз ғалаба".split()
+QUERIES = {
+    "contains": ["kitob", "o‘zbekiston tarix", "qishloq xo'jaligi"],
+    "exact": ["kitob o'qish", "ўзбекистон тарих"],
+    "fuzzy": ["kitb", "ozbekiston"],
+}
+
+
+def synthetic_items(hours: float, rng: random.Random):
+    """
+    (start, end, text) ro'yxati: har 3 soniyada segment, lotin/kirill va apostrof
+    variantlari aralash (normalize_uz ishlashi uchun), kam uchraydigan so'zlar ham bor.
+    """
+    items = []
+    for i in range(int(hours * 3600 / SEGMENT_SEC)):
+        words = [rng.choice(CYRILLIC if rng.random() < 0.2 else LATIN) for _ in range(WORDS_PER_SEGMENT - 1)]
+        words.append(f"so'z{rng.randint(0, 50000)}")
+        start = i * SEGMENT_SEC
+        items.append((start, start + SEGMENT_SEC - 0.4, " ".join(words).replace("'", rng.choice("'‘ʻ"))))
+    return items
+
+
+def measure(fn, repeat: int):
+    """
+    Mediana va eng yaxshi natija (soniya / bitta chaqiruv).
+    """
+    fn()  # isitish (importlar, keshlar)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= MIN_TIME or number >= 1 << 20:
+            break
+        number *= 2
+    runs = [dt / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) / number)
+    return statistics.median(runs), min(runs)
+
+
+def make_cases(items, tmp: str):
+    """
+    {nom: funksiya}. Har bir funksiya butun transkript bo'yicha bitta to'liq o'tishni bajaradi.
+    """
+    srt_path = os.path.join(tmp, "bench.srt")
+    segments = [Segment(st, en, txt) for st, en, txt in items]
+    make_srt_from_segments(segments, srt_path)
+    load_transcript(srt_path)  # .segments.bin yoziladi
+    index = TranscriptIndex.from_items(items)
+    timeline = SubtitleTimeline(items)
+    texts = [txt for _st, _en, txt in items]
+    starts = [st for st, _en, _txt in items]
+    duration = items[-1][1] if items else 0.0
+    # ijro: soniyasiga ~30 marta position o'zgaradi (10 daqiqalik bo'lak), sakrashlar - tasodifiy
+    playback = [600.0 + k / 30.0 for k in range(30 * 600)]
+    rng = random.Random(1)
+    seeks = [rng.uniform(0, duration) for _ in range(10000)]
+
+    def search_loop(query, mode):
+        # search_now: normalize -> indeks -> (vaqt, tugash, matn) natijalari
+        def run():
+            q = normalize_uz(query)
+            seg_ids = index.search(q, mode=mode)
+            return [(items[i][0],) + tuple(items[i][1:]) for i in seg_ids]
+        return run
+
+    def lookup(times):
+        def run():
+            timeline._reset_cursor()
+            for t in times:
+                timeline.lookup(t)
+        return run
+
+    cases = {
+        "load_srt_items": lambda: load_srt_items(srt_path),
+        "load_transcript_mmap": lambda: load_transcript(srt_path),
+        "make_srt_from_segments": lambda: make_srt_from_segments(segments, os.path.join(tmp, "out.srt")),
+        "normalize_text": lambda: [normalize_uz(t) for t in texts],
+        "sec_to_hhmmss": lambda: [sec_to_hhmmss(s) for s in starts],
+        "timeline_playback_18k": lookup(playback),
+        "timeline_seek_10k": lookup(seeks),
+    }
+    for mode, queries in QUERIES.items():
+        for query in queries:
+            cases[f"search_{mode}[{query}]"] = search_loop(query, mode)
+    return cases
+
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{platform.python_version()}"
+
+
+def load_previous(path: str):
+    """
+    Shu kompyuterdagi oxirgi natija: {(soat, benchmark): eng yaxshi vaqt}.
+    """
+    if not os.path.exists(path):
+        return {}
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("machine") == machine_id():
+                last = run
+    if last is None:
+        return {}
+    return {(r["hours"], r["name"]): r["min"] for r in last["results"]}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--filter", default="", help="faqat nomida shu matn bor benchmarklar")
+    ap.add_argument("--results", default=RESULTS_PATH, help="natijalar tarixi (JSON lines)")
+    ap.add_argument("--no-save", action="store_true")
+    ap.add_argument("--compare", action="store_true", help="oldingi natija bilan solishtirish")
+    ap.add_argument("--max-regression", type=float, default=1.25, help="ruxsat etilgan sekinlashish (marta)")
+    args = ap.parse_args()
+
+    previous = load_previous(args.results) if args.compare else {}
+    results = []
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for hours in args.hours:
+            items = synthetic_items(hours, random.Random(0))
+            print(f"--- {hours:g} soat, {len(items)} segment")
+            for name, fn in make_cases(items, tmp).items():
+                if args.filter not in name:
+                    continue
+                median, best = measure(fn, args.repeat)
+                results.append({"hours": hours, "name": name, "median": median, "min": best})
+                line = f"  {name:36s} {median * 1000:10.3f} ms  (min {best * 1000:.3f})"
+                old = previous.get((hours, name))
+                if old:
+                    # eng yaxshi vaqt bo'yicha - fon yuklamasi shovqiniga kamroq sezgir
+                    ratio = best / old
+                    line += f"  {ratio:5.2f}x"
+                    if ratio > args.max_regression:
+                        regressions.append((hours, name, ratio))
+                        line += "  SEKINLASHDI"
+                print(line)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine_id(),
+                                "results": results}, ensure_ascii=False) + "\n")
+    if regressions:
+        print("XATO: sekinlashgan benchmarklar:")
+        for hours, name, ratio in regressions:
+            print(f"  {hours:g}h {name}: {ratio:.2f}x > {args.max_regression:.2f}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Gemini generateContent endpointining lokal o'rinbosari (sinov va benchmark uchun).
+'index|matn' qatorlarini katta harf bilan qaytaradi, kechikish va xato
+ehtimolini sozlash mumkin.
+
+    python benchmarks/fake_gemini.py --port 8765 --latency 0.5
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=fake python audio.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        with server.lock:
+            server.requests += 1
+
+        if not self.path.endswith(":generateContent"):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = json.loads(body or b"{}")
+        prompt = "".join(part.get("text", "")
+                         for content in payload.get("contents", [])
+                         for part in content.get("parts", []))
+        time.sleep(server.latency)
+
+        lines = [ln for ln in prompt.splitlines() if "|" in ln and ln.split("|", 1)[0].strip().isdigit()]
+        out = [f"{ln.split('|', 1)[0]}|{ln.split('|', 1)[1].strip().capitalize()}" for ln in lines]
+        if out and server.rng.random() < server.fail_rate:
+            # noto'g'ri javob: bitta qator tushib qoladi
+            out.pop(server.rng.randrange(len(out)))
+
+        resp = {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "\n".join(out)}]},
+                            "finishReason": "STOP", "index": 0}],
+        }
+        data = json.dumps(resp).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_gemini(port: int = 0, latency: float = 0.2, fail_rate: float = 0.0, seed: int = 0):
+    """
+    Serverni fon threadda ishga tushiradi: (server, base_url).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeGeminiHandler)
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.rng = random.Random(seed)
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    server, url = start_fake_gemini(args.port, args.latency, args.fail_rate)
+    print(f"Fake Gemini: {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
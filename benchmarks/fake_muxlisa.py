@@ -0,0 +1,149 @@
+"""
+Muxlisa STT API ning lokal o'rinbosari (sinov va benchmark uchun).
+Sinxron /api/v2/stt darhol javob beradi, asinxron vazifa esa --job-sec
+soniyadan keyin tugaydi. Holat javobida qolgan vaqt Retry-After sifatida
+beriladi (--no-hints bilan o'chiriladi). So'rovlar soni hisoblanadi.
+Sinxron javob kechikishi yuklangan hajmga bog'liq (--sync-sec-per-mb),
+--fail-rate ulushidagi sinxron so'rovlar 503 qaytaradi.
+
+    python benchmarks/fake_muxlisa.py --port 8766 --job-sec 20
+    MUXLISA_BASE_URL=http://127.0.0.1:8766 python audio.py
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SEGMENT_SEC = 5.0
+AUDIO_BYTES_PER_SEC = 32000  # 16 kHz s16le mono
+
+
+def fake_segments(n_bytes: int, bytes_per_sec: int = AUDIO_BYTES_PER_SEC):
+    duration = max(SEGMENT_SEC, n_bytes / bytes_per_sec)
+    segments = []
+    t = 0.0
+    while t < duration:
+        segments.append({"start": t, "end": min(duration, t + SEGMENT_SEC), "text": f"segment {int(t)}"})
+        t += SEGMENT_SEC
+    return segments
+
+
+class FakeMuxlisaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, kind):
+        with self.server.lock:
+            self.server.counts[kind] = self.server.counts.get(kind, 0) + 1
+
+    def _json(self, code, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if length:
+            return len(self.rfile.read(length))
+        # chunked (oqimli) yuklash
+        total = 0
+        while True:
+            size = int(self.rfile.readline().strip() or b"0", 16)
+            if size == 0:
+                self.rfile.readline()
+                return total
+            total += len(self.rfile.read(size))
+            self.rfile.readline()
+
+    def do_POST(self):
+        n_bytes = self._read_body()
+        with self.server.lock:
+            self.server.upload_bytes += n_bytes
+        if self.path == "/api/v2/stt":
+            self._count("sync")
+            time.sleep(self.server.sync_latency + self.server.sync_sec_per_mb * n_bytes / (1024 * 1024))
+            with self.server.lock:
+                fail = self.server.rng.random() < self.server.fail_rate
+            if fail:
+                self._count("sync_failed")
+                self._json(503, {"error": "busy"})
+                return
+            self._json(200, {"result": {"segments": fake_segments(n_bytes)}})
+        elif self.path == "/api/v1/async/stt":
+            self._count("submit")
+            task_id = str(next(self.server.ids))
+            with self.server.lock:
+                self.server.jobs[task_id] = (time.monotonic() + self.server.job_sec, n_bytes)
+            self._json(200, {"task_id": task_id})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_GET(self):
+        prefix = "/api/v1/async/stt/status/"
+        if not self.path.startswith(prefix):
+            self._json(404, {"error": "not found"})
+            return
+        self._count("status")
+        job = self.server.jobs.get(self.path[len(prefix):])
+        if job is None:
+            self._json(404, {"error": "unknown task"})
+            return
+        ready_at, n_bytes = job
+        left = ready_at - time.monotonic()
+        if left > 0:
+            headers = {"Retry-After": f"{left:.2f}"} if self.server.hints else {}
+            self._json(200, {"status": "processing"}, headers)
+        else:
+            self._json(200, {"status": "completed", "result": {"segments": fake_segments(n_bytes)}})
+
+
+def start_fake_muxlisa(port: int = 0, job_sec: float = 5.0, sync_latency: float = 0.2, hints: bool = True,
+                       sync_sec_per_mb: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+    """
+    Serverni fon threadda ishga tushiradi: (server, base_url).
+    server.counts - so'rovlar soni turi bo'yicha.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeMuxlisaHandler)
+    server.job_sec = job_sec
+    server.sync_latency = sync_latency
+    server.hints = hints
+    server.sync_sec_per_mb = sync_sec_per_mb
+    server.fail_rate = fail_rate
+    server.rng = random.Random(seed)
+    server.jobs = {}
+    server.ids = itertools.count(1)
+    server.counts = {}
+    server.upload_bytes = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--job-sec", type=float, default=20.0)
+    ap.add_argument("--no-hints", action="store_true")
+    args = ap.parse_args()
+    server, url = start_fake_muxlisa(args.port, args.job_sec, hints=not args.no_hints)
+    print(f"Fake Muxlisa: {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
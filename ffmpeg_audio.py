@@ -0,0 +1,180 @@
+import os
+import subprocess
+import threading
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+READ_CHUNK_BYTES = 1 << 20  # 1 MB (~32 soniya 16kHz s16le)
+SEARCH_SEC = 15.0   # chegarani maqsad nuqtadan +-15 soniya ichida qidiramiz
+FRAME_SEC = 0.05    # sukunat energiyasi shu uzunlikdagi oynalarda o'lchanadi
+
+# Yuklash uchun kodeklar: ffmpeg argumentlari, fayl kengaytmasi, MIME turi.
+# FLAC - yo'qotishsiz (~2 barobar kichik), Opus - nutq uchun ~15-20 barobar kichik.
+UPLOAD_CODECS = {
+    "flac": (["-c:a", "flac", "-f", "flac"], ".flac", "audio/flac"),
+    "opus": (["-c:a", "libopus", "-b:a", "32k", "-application", "voip", "-f", "ogg"], ".ogg", "audio/ogg"),
+    "wav": (["-c:a", "pcm_s16le", "-f", "wav"], ".wav", "audio/wav"),
+}
+
+
+def ffmpeg_pcm_cmd(media_path: str, sample_rate: int = SAMPLE_RATE):
+    return [
+        "ffmpeg", "-nostdin",
+        "-loglevel", "error",
+        "-i", media_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "s16le",
+        "-c:a", "pcm_s16le",
+        "-"
+    ]
+
+
+def probe_duration(media_path: str):
+    """
+    Media davomiyligi (soniya) ffprobe orqali; aniqlab bo'lmasa None.
+    """
+    try:
+        p = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0",
+                            media_path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=30)
+        return float(p.stdout.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def read_audio_pcm(media_path: str, sample_rate: int = SAMPLE_RATE, on_progress=None) -> np.ndarray:
+    """
+    Videodan audioni diskka WAV yozmasdan to'g'ridan-to'g'ri o'qish.
+    FFmpeg stdout dagi s16le PCM float32 [-1, 1] massivga aylantiriladi,
+    uni model.transcribe ga fayl o'rniga berish mumkin.
+    on_progress(soniya) - dekodlangan audio uzunligi (o'qilgan baytlardan).
+    """
+    p = subprocess.Popen(ffmpeg_pcm_cmd(media_path, sample_rate), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # stderr to'lib qolib ffmpeg to'xtab qolmasligi uchun alohida o'qiymiz
+    err_chunks = []
+    err_thread = threading.Thread(target=lambda: err_chunks.append(p.stderr.read()), daemon=True)
+    err_thread.start()
+
+    buf = bytearray()
+    while True:
+        chunk = p.stdout.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        buf += chunk
+        if on_progress:
+            on_progress(len(buf) / (2 * sample_rate))
+    p.stdout.close()
+    p.wait()
+    err_thread.join()
+
+    if p.returncode != 0:
+        err = b"".join(err_chunks).decode("utf-8", errors="replace")
+        raise RuntimeError("FFmpeg xatolik:\n" + (err[-2000:] if err else "Unknown error"))
+
+    # toq bayt qolgan bo'lsa (uzilgan oqim) tashlab yuboriladi
+    usable = len(buf) - (len(buf) % 2)
+    audio = np.frombuffer(buf, dtype=np.int16, count=usable // 2).astype(np.float32)
+    audio /= 32768.0
+    return audio
+
+
+def find_silence_splits(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, chunk_sec: float = 300.0,
+                        search_sec: float = SEARCH_SEC, frame_sec: float = FRAME_SEC):
+    """
+    Audioni ~chunk_sec uzunlikdagi bo'laklarga eng jim joylardan bo'lish.
+    Natija faqat audio va chunk_sec ga bog'liq (worker soniga emas):
+    [(start_sample, end_sample), ...]
+    """
+    n = len(audio)
+    chunk = max(1, int(chunk_sec * sample_rate))
+    search = int(search_sec * sample_rate)
+    frame = max(1, int(frame_sec * sample_rate))
+
+    bounds = [0]
+    pos = 0
+    while n - pos > chunk + search:
+        target = pos + chunk
+        lo = max(pos + frame, target - search)
+        hi = min(n - frame, target + search)
+        nframes = (hi - lo) // frame
+        if nframes <= 0:
+            break
+        window = audio[lo:lo + nframes * frame].reshape(nframes, frame)
+        energy = np.square(window, dtype=np.float32).mean(axis=1)
+        # argmin birinchi minimumni qaytaradi - natija barqaror
+        cut = lo + int(np.argmin(energy)) * frame + frame // 2
+        bounds.append(cut)
+        pos = cut
+    bounds.append(n)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def ffmpeg_encode_cmd(media_path: str, codec: str = "flac", out_path: str = "-", sample_rate: int = SAMPLE_RATE):
+    codec_args = UPLOAD_CODECS[codec][0]
+    return [
+        "ffmpeg", "-y", "-nostdin",
+        "-loglevel", "error",
+        "-i", media_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+    ] + codec_args + [out_path]
+
+
+def encode_pcm(samples: np.ndarray, codec: str = "flac", sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    Xotiradagi float32 [-1, 1] PCM bo'lagini FLAC/Opus ga kodlash (stdin -> stdout,
+    diskka yozilmaydi). Muxlisa fan-out bo'laklari shu bilan bittadan kodlanadi.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    cmd = [
+        "ffmpeg", "-nostdin",
+        "-loglevel", "error",
+        "-f", "s16le",
+        "-ar", str(sample_rate),
+        "-ac", "1",
+        "-i", "-",
+    ] + UPLOAD_CODECS[codec][0] + ["-"]
+    p = subprocess.run(cmd, input=pcm.tobytes(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if p.returncode != 0:
+        err = p.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError("FFmpeg xatolik:\n" + (err[-2000:] if err else "Unknown error"))
+    return p.stdout
+
+
+def encoded_path_for(media_path: str, codec: str = "flac") -> str:
+    return os.path.splitext(media_path)[0] + "_audio" + UPLOAD_CODECS[codec][1]
+
+
+def encode_audio_file(media_path: str, out_path: str, codec: str = "flac", on_progress=None):
+    """
+    Videodan yuklash uchun ixcham audio fayl (16kHz mono FLAC/Opus).
+    on_progress(soniya) - ffmpeg -progress bo'yicha kodlangan audio uzunligi.
+    """
+    cmd = ffmpeg_encode_cmd(media_path, codec, out_path)
+    if on_progress is None:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                           errors="replace")
+        stderr = p.stderr
+    else:
+        # -progress key=value qatorlarini stdout ga yozadi (fayl chiqishi bilan to'qnashmaydi)
+        cmd = cmd[:-1] + ["-progress", "pipe:1", "-nostats"] + cmd[-1:]
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                             errors="replace")
+        err_chunks = []
+        err_thread = threading.Thread(target=lambda: err_chunks.append(p.stderr.read()), daemon=True)
+        err_thread.start()
+        for line in p.stdout:
+            key, _, value = line.strip().partition("=")
+            if key == "out_time_us" and value.isdigit():
+                on_progress(int(value) / 1e6)
+        p.wait()
+        err_thread.join()
+        stderr = "".join(err_chunks)
+    if p.returncode != 0:
+        raise RuntimeError("FFmpeg xatolik:\n" + (stderr[-2000:] if stderr else "Unknown error"))
+    return out_path
@@ -1,83 +1,23 @@
 import os
-import re
-import subprocess
 import threading
 import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 import vlc
-import srt
-from faster_whisper import WhisperModel
 
-
-# ---------- yordamchi funksiyalar ----------
-def sec_to_hhmmss(sec: float) -> str:
-    sec = max(0.0, float(sec))
-    h = int(sec // 3600)
-    m = int((sec % 3600) // 60)
-    s_ = int(sec % 60)
-    return f"{h:02d}:{m:02d}:{s_:02d}"
-
-
-def run_ffmpeg_extract_audio(video_path: str, wav_path: str):
-    """
-    Videodan WAV audio chiqarish (16kHz mono) - transkripsiya uchun qulay.
-    """
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", video_path,
-        "-vn",
-        "-ac", "1",
-        "-ar", "16000",
-        "-c:a", "pcm_s16le",
-        wav_path
-    ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if p.returncode != 0:
-        raise RuntimeError("FFmpeg xatolik:\n" + (p.stderr[-2000:] if p.stderr else "Unknown error"))
-
-
-def make_srt_from_segments(segments, srt_path: str):
-    subs = []
-    i = 1
-    for seg in segments:
-        start = float(seg.start)
-        end = float(seg.end)
-        text = (seg.text or "").strip()
-        if not text:
-            continue
-        subs.append(
-            srt.Subtitle(
-                index=i,
-                start=srt.timedelta(seconds=start),
-                end=srt.timedelta(seconds=end),
-                content=text
-            )
-        )
-        i += 1
-    data = srt.compose(subs)
-    with open(srt_path, "w", encoding="utf-8") as f:
-        f.write(data)
-
-
-def load_srt_items(srt_path: str):
-    with open(srt_path, "r", encoding="utf-8", errors="ignore") as f:
-        data = f.read()
-    subs = list(srt.parse(data))
-    items = []
-    for sub in subs:
-        start_sec = sub.start.total_seconds()
-        end_sec = sub.end.total_seconds()
-        txt = sub.content.replace("\n", " ").strip()
-        items.append((start_sec, end_sec, txt))
-    return items
+from search_index import TranscriptIndex
+from uz_normalize import normalize_uz
+from word_index import WordIndex, words_path_for
+from transcript_cache import TranscriptCache
+from parallel_transcribe import use_worker_main
+from pipeline import Pipeline, load_srt_items, sec_to_hhmmss
 
 
+# ---------- yordamchi funksiyalar ----------
 def normalize_text(s: str) -> str:
-    s = (s or "").lower().strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    # kichik harf + kirill/lotin + apostrof variantlari + tinish belgilari (uz_normalize)
+    return normalize_uz(s)
 
 
 # ---------- Asosiy App ----------
@@ -88,9 +28,11 @@ class VideoSearchApp(tk.Tk):
         self.geometry("1200x720")
 
         self.video_path = ""
-        self.audio_path = ""
         self.srt_path = ""
         self.srt_items = []  # (start_sec, end_sec, text)
+        self.search_index = TranscriptIndex()
+        self.transcript_cache = TranscriptCache()
+        self.word_index = None  # WordIndex | None (so'z darajasidagi vaqtlar)
 
         # ✅ Play bosilganda shu sekunddan davom etishi uchun
         self.last_seek_sec = None  # float | None
@@ -164,9 +106,10 @@ class VideoSearchApp(tk.Tk):
         self.btn_search = ttk.Button(search_box, text="Qidir", command=self.search_now)
         self.btn_search.pack(side=tk.LEFT, padx=8, pady=8)
 
-        self.match_mode = tk.StringVar(value="contains")  # contains/exact
+        self.match_mode = tk.StringVar(value="contains")  # contains/exact/fuzzy
         ttk.Radiobutton(search_box, text="Ichida bor", variable=self.match_mode, value="contains").pack(side=tk.LEFT)
         ttk.Radiobutton(search_box, text="To'liq mos", variable=self.match_mode, value="exact").pack(side=tk.LEFT)
+        ttk.Radiobutton(search_box, text="Taxminiy", variable=self.match_mode, value="fuzzy").pack(side=tk.LEFT)
 
         results_box = ttk.LabelFrame(right, text="Natijalar (bosilganda video o‘sha joydan ketadi)")
         results_box.pack(side=tk.TOP, fill=tk.BOTH, expand=True, pady=(8, 8))
@@ -203,7 +146,6 @@ class VideoSearchApp(tk.Tk):
         if not path:
             return
         self.video_path = path
-        self.audio_path = os.path.splitext(path)[0] + "_audio.wav"
         self.srt_path = os.path.splitext(path)[0] + ".srt"
 
         media = self.instance.media_new(self.video_path)
@@ -266,44 +208,52 @@ class VideoSearchApp(tk.Tk):
 
     def make_subtitles(self):
         try:
-            self._set_status("Holat: audio qirqilmoqda (FFmpeg)...")
-            run_ffmpeg_extract_audio(self.video_path, self.audio_path)
-
+            # ✅ FFmpeg, Whisper (bo'laklab/parallel), kesh va .part SRT - umumiy konveyerda (pipeline.py)
+            self._reset_transcript()
             self._set_status("Holat: transkripsiya (subtitle) qilinmoqda...")
-            model_name = self.model_var.get().strip()
-            model = WhisperModel(model_name, device="cpu", compute_type="int8")
-
-            lang = self.lang_var.get().strip().lower()
-            language = None if lang == "auto" else lang
-
-            segments, info = model.transcribe(
-                self.audio_path,
-                language=language,
-                beam_size=5,
-                vad_filter=True
-            )
-
-            seg_list = list(segments)
-            make_srt_from_segments(seg_list, self.srt_path)
-
-            self._set_status("Holat: SRT tayyor. Yuklanmoqda...")
+            result = self._pipeline().process(self.video_path, self.srt_path, on_segment=self._on_segment)
             self._load_srt_into_ui()
-
-            self._set_status(f"Holat: tayyor ✅  ({os.path.basename(self.srt_path)})")
+            if result["cached"]:
+                stats = self.transcript_cache.stats()
+                self._set_status(f"Holat: keshdan ✅ (hit {stats['hits']} / miss {stats['misses']})")
+            else:
+                self._set_status(f"Holat: tayyor ✅  ({os.path.basename(self.srt_path)})")
         except Exception as e:
             self._set_status("Holat: xatolik ❌")
             messagebox.showerror("Xatolik", str(e))
 
+    def _pipeline(self):
+        # Gemini tuzatishisiz: xom transkript (kesh kaliti ham shunga mos)
+        return Pipeline(whisper_model=self.model_var.get().strip(),
+                        language=self.lang_var.get().strip().lower(),
+                        refine=False, transcript_cache=self.transcript_cache, on_status=self._set_status)
+
     def _set_status(self, text: str):
         self.progress.after(0, lambda: self.progress.config(text=text))
 
+    def _load_cached_transcript(self):
+        if not self._pipeline().load_cached(self.video_path, self.srt_path):
+            return False
+        self._load_srt_into_ui()
+        stats = self.transcript_cache.stats()
+        self._set_status(f"Holat: keshdan ✅ (hit {stats['hits']} / miss {stats['misses']})")
+        return True
+
     def _try_load_existing_srt(self):
         if self.srt_path and os.path.exists(self.srt_path):
             self._load_srt_into_ui()
+        elif self.video_path:
+            try:
+                self._load_cached_transcript()
+            except Exception:
+                pass
 
     def _load_srt_into_ui(self):
         try:
-            self.srt_items = load_srt_items(self.srt_path)
+            items = load_srt_items(self.srt_path)
+            self.search_index = TranscriptIndex.from_items(items)
+            self.word_index = self._load_word_index(len(items))
+            self.srt_items = items
         except Exception as e:
             messagebox.showerror("SRT o‘qish xatosi", str(e))
             return
@@ -316,6 +266,34 @@ class VideoSearchApp(tk.Tk):
 
         self.segments_text.after(0, fill)
 
+    def _load_word_index(self, n_segments):
+        path = words_path_for(self.srt_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            words = WordIndex.load(path)
+        except Exception:
+            return None
+        # SRT qo'lda o'zgartirilgan bo'lsa, so'z vaqtlari mos kelmaydi
+        return words if words.n_segments == n_segments else None
+
+    def _reset_transcript(self):
+        self.srt_items = []
+        self.search_index = TranscriptIndex()
+        self.word_index = None
+        self.segments_text.after(0, lambda: self.segments_text.delete("1.0", tk.END))
+
+    def _on_segment(self, item):
+        # ✅ Segmentlar kelishi bilan ro'yxatga chiqadi va qidiruvga tayyor bo'ladi
+        self.srt_items.append(item)
+        self.search_index.add(len(self.srt_items) - 1, item[2])
+        self._append_segment_to_ui(item)
+
+    def _append_segment_to_ui(self, item):
+        st, en, txt = item
+        line = f"[{sec_to_hhmmss(st)} - {sec_to_hhmmss(en)}] {txt}\n"
+        self.segments_text.after(0, lambda: self.segments_text.insert(tk.END, line))
+
     # ---------- qidirish ----------
     def search_now(self):
         if not self.srt_items:
@@ -326,18 +304,19 @@ class VideoSearchApp(tk.Tk):
         if not q:
             return
 
+        # ✅ Teskari indeks: "Ichida bor" - barcha so'zlar, "To'liq mos" - aniq ibora,
+        # "Taxminiy" - xatoli yozuvlar ham (eng o'xshashi birinchi)
         mode = self.match_mode.get()
+        seg_ids = self.search_index.search(q, mode=mode)
         matches = []
-
-        for (st, en, txt) in self.srt_items:
-            tnorm = normalize_text(txt)
-            if mode == "exact":
-                ok = (tnorm == q)
-            else:
-                ok = (q in tnorm)
-
-            if ok:
-                matches.append((st, en, txt))
+        for i in seg_ids:
+            st, en, txt = self.srt_items[i]
+            # ✅ So'z vaqtlari bo'lsa - aynan so'z aytilgan joyga
+            if self.word_index is not None:
+                wt = self.word_index.find_word_time(i, q, mode)
+                if wt is not None:
+                    st = wt
+            matches.append((st, en, txt))
 
         self.results_list.delete(0, tk.END)
 
@@ -370,5 +349,7 @@ class VideoSearchApp(tk.Tk):
 
 
 if __name__ == "__main__":
+    # Whisper workerlari (spawn) bu skriptni va Tk/VLC ni qayta import qilmasin
+    use_worker_main()
     app = VideoSearchApp()
     app.mainloop()
@@ -0,0 +1,226 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+BATCH_TOKENS = int(os.getenv("GEMINI_BATCH_TOKENS", "1500"))   # bitta so'rovdagi matn hajmi (taxminan)
+CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))       # bir vaqtda yuboriladigan so'rovlar
+RETRIES = 2
+CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", ".gemini_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX", "200000"))
+
+REFINE_PROMPT = (
+    "Quyidagi qatorlarni grammatik tuzatib ber. "
+    "Faqat 'index|matn' formatida qaytar. Segmentlarni o'zgartirma.\n\n"
+)
+
+
+# Prompt o'zgarsa eski keshdagi javoblar avtomatik eskiradi
+PROMPT_VERSION = hashlib.blake2b(REFINE_PROMPT.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class RefineBatchError(Exception):
+    pass
+
+
+class RefineCache:
+    """
+    Tuzatilgan qatorlar uchun diskdagi kesh (SQLite).
+    Kalit: hash(segment matni, prompt versiyasi, model). Hajm chegarasidan
+    oshsa eng uzoq ishlatilmagan yozuvlar o'chiriladi.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 prompt_version: str = PROMPT_VERSION):
+        self.path = path
+        self.max_entries = max_entries
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refine (key TEXT PRIMARY KEY, text TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS refine_used ON refine(used)")
+        self._conn.commit()
+
+    def key(self, text: str, model: str) -> str:
+        raw = f"{self.prompt_version}|{model}|{text}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, texts, model: str):
+        """
+        {matn: tuzatilgan_matn} - faqat keshda borlari.
+        """
+        keys = {self.key(t, model): t for t in set(texts)}
+        found = {}
+        now = time.time()
+        with self._lock:
+            items = list(keys.items())
+            for i in range(0, len(items), 500):
+                part = items[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, text FROM refine WHERE key IN ({','.join('?' * len(part))})",
+                    [k for k, _ in part],
+                ).fetchall()
+                for k, refined in rows:
+                    found[keys[k]] = refined
+                self._conn.executemany("UPDATE refine SET used=? WHERE key=?", [(now, k) for k, _ in rows])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, pairs, model: str):
+        now = time.time()
+        rows = [(self.key(src, model), dst, now) for src, dst in pairs]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO refine (key, text, used) VALUES (?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM refine").fetchone()
+        extra = count - self.max_entries
+        if extra > 0:
+            self._conn.execute(
+                "DELETE FROM refine WHERE key IN (SELECT key FROM refine ORDER BY used LIMIT ?)", (extra,)
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": (self.hits / total) if total else 0.0}
+
+
+def estimate_tokens(text: str) -> int:
+    # Gemini tokenlari uchun taxminiy baho: ~4 belgi = 1 token
+    return len(text) // 4 + 1
+
+
+def make_batches(lines, max_tokens: int = BATCH_TOKENS):
+    """
+    [(index, matn), ...] ni token chegarasidan oshmaydigan bo'laklarga ajratish.
+    """
+    batches = []
+    cur = []
+    cur_tokens = 0
+    for idx, text in lines:
+        t = estimate_tokens(f"{idx}|{text}\n")
+        if cur and cur_tokens + t > max_tokens:
+            batches.append(cur)
+            cur = []
+            cur_tokens = 0
+        cur.append((idx, text))
+        cur_tokens += t
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def build_prompt(batch) -> str:
+    return REFINE_PROMPT + "\n".join(f"{idx}|{text}" for idx, text in batch)
+
+
+def parse_response(response_text: str, batch):
+    """
+    Javobni tekshirish: har bir index aynan bir marta, boshqa index yo'q,
+    matn bo'sh emas. Aks holda RefineBatchError.
+    """
+    expected = {idx for idx, _ in batch}
+    out = {}
+    for line in (response_text or "").strip().splitlines():
+        line = line.strip().strip("`")
+        if "|" not in line:
+            continue
+        head, text = line.split("|", 1)
+        try:
+            idx = int(head.strip())
+        except ValueError:
+            continue
+        text = text.strip()
+        if idx not in expected:
+            raise RefineBatchError(f"kutilmagan index: {idx}")
+        if idx in out:
+            raise RefineBatchError(f"takroriy index: {idx}")
+        if not text:
+            raise RefineBatchError(f"bo'sh matn: {idx}")
+        out[idx] = text
+    missing = expected - out.keys()
+    if missing:
+        raise RefineBatchError(f"{len(missing)} ta qator qaytmadi")
+    return out
+
+
+def gemini_generate_fn(model: str = DEFAULT_MODEL, api_key: str = None, base_url: str = None):
+    """
+    prompt -> javob matni funksiyasi. GEMINI_BASE_URL berilsa so'rovlar
+    o'sha manzilga ketadi (masalan, lokal soxta server bilan sinash uchun).
+    """
+    # google.genai importi ~0.5 s - dastur ochilishini sekinlashtirmasligi uchun shu yerda
+    from google import genai
+
+    base_url = base_url or os.getenv("GEMINI_BASE_URL")
+    kwargs = {"api_key": api_key or os.getenv("GEMINI_API_KEY")}
+    if base_url:
+        kwargs["http_options"] = {"base_url": base_url}
+    client = genai.Client(**kwargs)
+
+    def generate(prompt: str) -> str:
+        response = client.models.generate_content(model=model, contents=prompt)
+        return response.text if response else ""
+    return generate
+
+
+def refine_lines(lines, generate, max_tokens: int = BATCH_TOKENS, concurrency: int = CONCURRENCY,
+                 retries: int = RETRIES, on_progress=None, cache: RefineCache = None, model: str = DEFAULT_MODEL):
+    """
+    Butun transkriptni bo'laklab, parallel ravishda tuzatish.
+    Faqat xato bergan bo'laklar qayta yuboriladi (ikkinchi urinishda yarmiga bo'linib).
+    cache berilsa, avval tuzatilgan qatorlar modelga yuborilmaydi.
+    Natija: ({index: tuzatilgan_matn}, tuzatilmay qolgan qatorlar soni)
+    """
+    refined = {}
+    texts = dict(lines)
+    if cache is not None:
+        cached = cache.get_many(texts.values(), model)
+        refined = {idx: cached[text] for idx, text in lines if text in cached}
+        lines = [(idx, text) for idx, text in lines if idx not in refined]
+    pending = make_batches(lines, max_tokens)
+    done = 0
+
+    def run(batch):
+        return parse_response(generate(build_prompt(batch)), batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            failed = []
+            futures = {ex.submit(run, batch): batch for batch in pending}
+            for fut in as_completed(futures):
+                batch = futures[fut]
+                try:
+                    result = fut.result()
+                    refined.update(result)
+                    if cache is not None:
+                        cache.put_many([(texts[idx], text) for idx, text in result.items()], model)
+                    done += len(batch)
+                except Exception as e:
+                    print(f"DEBUG: Gemini batch error ({len(batch)} qator): {e}")
+                    failed.append(batch)
+                if on_progress:
+                    on_progress(done, len(lines))
+            # uzun bo'lak qayta xato bermasligi uchun ikkiga bo'lamiz
+            pending = []
+            for batch in failed:
+                if len(batch) > 1:
+                    mid = len(batch) // 2
+                    pending += [batch[:mid], batch[mid:]]
+                else:
+                    pending.append(batch)
+    return refined, sum(len(batch) for batch in pending)
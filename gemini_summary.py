@@ -0,0 +1,116 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_refine import CONCURRENCY, DEFAULT_MODEL, RefineCache, estimate_tokens
+from progress import sec_to_hhmmss
+
+
+WINDOW_SEC = float(os.getenv("SUMMARY_WINDOW_SEC", "600"))     # har bir bo'lak ~10 daqiqa
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))  # bitta so'rovga sig'adigan matn
+REDUCE_TOKENS = 8000
+
+SUMMARY_PROMPT = "Quyidagi matnni o'zbek tilida qisqacha xulosa qilib ber:\n\n"
+MAP_PROMPT = (
+    "Quyidagi video transkripti bo'lagining asosiy fikrlarini o'zbek tilida "
+    "3-5 gapda qisqacha yozib ber:\n\n"
+)
+REDUCE_PROMPT = (
+    "Quyidagilar bitta videoning ketma-ket qismlari xulosalari. Ulardan butun video "
+    "uchun o'zbek tilida qisqacha yagona xulosa tuzib ber:\n\n"
+)
+SUMMARY_VERSION = hashlib.blake2b((SUMMARY_PROMPT + MAP_PROMPT + REDUCE_PROMPT).encode("utf-8"),
+                                  digest_size=8).hexdigest()
+
+
+def window_chunks(items, window_sec: float = WINDOW_SEC, max_tokens: int = CHUNK_TOKENS):
+    """
+    Segmentlarni qat'iy vaqt oynalariga (0-10, 10-20 daqiqa, ...) bo'lish.
+    Oynalar chegarasi matnga bog'liq emas, shuning uchun transkriptdagi kichik
+    o'zgarish faqat o'z oynasining xulosasini eskirtiradi.
+    Natija: ["[00:00:00-00:10:00] matn ...", ...]
+    """
+    chunks = []
+    cur = []
+    cur_tokens = 0
+    cur_window = None
+    for st, en, txt in items:
+        window = int(st // window_sec)
+        t = estimate_tokens(txt)
+        if cur and (window != cur_window or cur_tokens + t > max_tokens):
+            chunks.append(cur)
+            cur = []
+            cur_tokens = 0
+        cur_window = window
+        cur.append((st, en, txt))
+        cur_tokens += t
+    if cur:
+        chunks.append(cur)
+    return [f"[{sec_to_hhmmss(c[0][0])}-{sec_to_hhmmss(c[-1][1])}] " + " ".join(txt for _, _, txt in c) for c in chunks]
+
+
+class SummaryCache(RefineCache):
+    """
+    Bo'lak xulosalari uchun kesh (tuzatish keshi bilan bir fayl, boshqa prompt versiyasi).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("prompt_version", SUMMARY_VERSION)
+        super().__init__(**kwargs)
+
+
+def _cached_generate(generate, prompt_prefix, texts, cache, model, concurrency):
+    results = cache.get_many(texts, model) if cache is not None else {}
+    missing = [t for t in dict.fromkeys(texts) if t not in results]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+            answers = list(ex.map(lambda t: generate(prompt_prefix + t), missing))
+        for text, answer in zip(missing, answers):
+            if not answer:
+                raise RuntimeError("Gemini bo'sh javob qaytardi")
+            results[text] = answer.strip()
+        if cache is not None:
+            cache.put_many([(t, results[t]) for t in missing], model)
+    return [results[t] for t in texts]
+
+
+def summarize_transcript(items, generate, cache: SummaryCache = None, model: str = DEFAULT_MODEL,
+                         concurrency: int = CONCURRENCY, on_progress=None):
+    """
+    Uzun transkript uchun map-reduce xulosa: vaqt oynalari parallel xulosa
+    qilinadi (har biri kontent-xesh bo'yicha keshlanadi), so'ng qismlar
+    xulosalari bitta yakuniy xulosaga birlashtiriladi.
+    """
+    chunks = window_chunks(items)
+    if not chunks:
+        return ""
+    if len(chunks) == 1:
+        text = " ".join(txt for _, _, txt in items)
+        return _cached_generate(generate, SUMMARY_PROMPT, [text], cache, model, concurrency)[0]
+
+    if on_progress:
+        on_progress(f"{len(chunks)} ta bo'lak")
+    partials = _cached_generate(generate, MAP_PROMPT, chunks, cache, model, concurrency)
+    labels = [c.split("]", 1)[0] + "]" for c in chunks]
+    parts = [f"{label} {summary}" for label, summary in zip(labels, partials)]
+
+    # xulosalar ham juda ko'p bo'lsa, bosqichma-bosqich birlashtiramiz
+    while sum(estimate_tokens(p) for p in parts) > REDUCE_TOKENS and len(parts) > 1:
+        groups = []
+        cur = []
+        for p in parts:
+            if cur and sum(estimate_tokens(x) for x in cur) + estimate_tokens(p) > REDUCE_TOKENS:
+                groups.append(cur)
+                cur = []
+            cur.append(p)
+        groups.append(cur)
+        if len(groups) == len(parts):
+            break
+        texts = ["\n".join(g) for g in groups]
+        merged = _cached_generate(generate, REDUCE_PROMPT, texts, cache, model, concurrency)
+        parts = [f"{g[0].split(']', 1)[0].split('-')[0]}-{g[-1].split(']', 1)[0].split('-')[-1]}] {m}"
+                 for g, m in zip(groups, merged)]
+
+    if on_progress:
+        on_progress("yakuniy xulosa")
+    return _cached_generate(generate, REDUCE_PROMPT, ["\n".join(parts)], cache, model, concurrency)[0]
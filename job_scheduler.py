@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+PRIORITY_BACKGROUND = 0
+PRIORITY_OPEN = 10  # hozir ochiq turgan video
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    Navbatdagi bitta ish. fn(job) ichida uzoq jarayon job.check() ni
+    vaqti-vaqti bilan chaqiradi - bekor qilingan bo'lsa JobCancelled ko'tariladi.
+    """
+
+    def __init__(self, key, fn, priority: int, label: str = ""):
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.label = label or str(key)
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.progress = None  # joriy bosqich (progress.StageProgress), UI uchun
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.label)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def active(self) -> bool:
+        return self.state in (QUEUED, RUNNING)
+
+
+class JobScheduler:
+    """
+    Cheklangan sondagi worker threadlar bilan ishlar navbati.
+    - bir xil kalitli faol ish qayta qo'shilmaydi (mavjudi qaytariladi);
+    - yuqori prioritetli ish navbatda oldinga o'tadi (ochiq video);
+    - bekor qilish kooperativ: navbatdagi ish umuman boshlanmaydi,
+      ishlayotgani job.check() da to'xtaydi.
+    on_change(scheduler) - holat o'zgarganda (UI yangilash uchun).
+    """
+
+    def __init__(self, workers: int = 1, on_change=None):
+        self.workers = max(1, int(workers))
+        self.on_change = on_change
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}  # key -> oxirgi Job
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change(self)
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._worker, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, key, fn, priority: int = PRIORITY_BACKGROUND, label: str = "") -> Job:
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is not None and job.active and not job.cancelled:
+                # dedup: shu ish allaqachon navbatda/ishlayapti
+                if job.state == QUEUED and priority > job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (-priority, next(self._seq), job))
+                    self._cond.notify()
+                return job
+            job = Job(key, fn, priority, label)
+            self._jobs[key] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._ensure_workers()
+            self._cond.notify()
+        self._notify()
+        return job
+
+    def set_priority(self, key, priority: int):
+        """
+        Navbatdagi ish prioritetini o'zgartirish (masalan, foydalanuvchi boshqa videoni ochdi).
+        """
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None or job.state != QUEUED or priority == job.priority:
+                return
+            job.priority = priority
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._cond.notify()
+        self._notify()
+
+    def cancel(self, key) -> bool:
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None or not job.active:
+                return False
+            job.cancel()
+            if job.state == QUEUED:
+                self._finish(job, CANCELLED)
+        self._notify()
+        return True
+
+    def cancel_all(self, keep=None):
+        with self._cond:
+            keys = [k for k, j in self._jobs.items() if j.active and k != keep]
+        for key in keys:
+            self.cancel(key)
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def counts(self):
+        out = {}
+        for job in self.jobs():
+            out[job.state] = out.get(job.state, 0) + 1
+        return out
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.cancel_all()
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished = time.monotonic()
+        job._done.set()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                while self._heap:
+                    neg_priority, _, job = heapq.heappop(self._heap)
+                    # eskirgan yozuvlar (prioritet oshirilgan yoki bekor qilingan) o'tkazib yuboriladi
+                    if job.state != QUEUED or -neg_priority != job.priority:
+                        continue
+                    job.state = RUNNING
+                    job.started = time.monotonic()
+                    return job
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._notify()
+            try:
+                job.check()
+                result = job.fn(job)
+            except JobCancelled:
+                with self._cond:
+                    self._finish(job, CANCELLED)
+            except Exception as e:
+                print(f"DEBUG: job {job.label} failed: {e}")
+                with self._cond:
+                    self._finish(job, FAILED, error=e)
+            else:
+                with self._cond:
+                    self._finish(job, DONE, result=result)
+            self._notify()
@@ -0,0 +1,403 @@
+import heapq
+import io
+import mimetypes
+import os
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ffmpeg_audio import SAMPLE_RATE, SEARCH_SEC, UPLOAD_CODECS, encode_pcm, find_silence_splits
+
+
+BASE_URL = os.getenv("MUXLISA_BASE_URL", "https://service.muxlisa.uz")
+SYNC_PATH = "/api/v2/stt"
+ASYNC_PATH = "/api/v1/async/stt"
+STATUS_PATH = "/api/v1/async/stt/status/{task_id}"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)  # vaqtinchalik xatolar - qayta so'raladi
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 300
+POLL_INITIAL = 1.0      # birinchi so'rov shuncha soniyadan keyin
+POLL_MAX = 30.0         # so'rovlar orasidagi eng katta oraliq
+POLL_TIMEOUT = 1800.0   # bitta vazifani kutishning umumiy chegarasi
+UPLOAD_CHUNK = 256 * 1024
+UPLOAD_CODEC = os.getenv("MUXLISA_UPLOAD_CODEC", "flac")  # flac | opus | wav
+SYNC_MAX_BYTES = 5 * 1024 * 1024  # sinxron endpoint shu hajmgacha tez javob beradi
+# Katta fayl: sinxron endpointga parallel bo'laklar (1) yoki asinxron navbat (0).
+# Fan-out butun audioni float32 PCM sifatida xotirada ushlaydi (3 soat ~0.7 GB), shuning uchun ixtiyoriy
+FANOUT = os.getenv("MUXLISA_FANOUT", "0") == "1"
+FANOUT_CONCURRENCY = int(os.getenv("MUXLISA_CONCURRENCY", "4"))
+
+
+class MuxlisaError(Exception):
+    pass
+
+
+class BytesUpload:
+    """
+    Yuklash manbai: xotiradagi tayyor fayl (masalan, bo'lak WAV).
+    """
+
+    def __init__(self, data: bytes, filename: str, mime: str):
+        self.data = data
+        self.filename = filename
+        self.mime = mime
+
+
+class MultipartUpload:
+    """
+    multipart/form-data tanasini xotirada yig'masdan, bo'laklab yuboradi.
+    Hajmi ma'lum bo'lsa (diskdagi fayl) Content-Length, aks holda chunked.
+    Yuborilgan baytlar va vaqt o'lchanadi.
+    """
+
+    def __init__(self, chunks, filename: str, mime: str, size: int = None, field: str = "audio", on_progress=None):
+        self.boundary = uuid.uuid4().hex
+        self._chunks = chunks
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._size = size
+        self.on_progress = on_progress
+        self.bytes_sent = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __bool__(self):
+        # requests "data or {}" tekshiradi - bo'sh deb hisoblanmasin
+        return True
+
+    def __len__(self):
+        # 0 - hajm noma'lum, requests chunked yuboradi
+        if self._size is None:
+            return 0
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self):
+        self.started = time.monotonic()
+        yield self._head
+        for chunk in self._chunks:
+            self.bytes_sent += len(chunk)
+            if self.on_progress:
+                self.on_progress(self.bytes_sent, time.monotonic() - self.started)
+            yield chunk
+        yield self._tail
+        self.finished = time.monotonic()
+
+    def throughput(self):
+        """
+        (baytlar, soniya, MB/s)
+        """
+        end = self.finished or time.monotonic()
+        seconds = max(1e-9, end - (self.started or end))
+        return self.bytes_sent, seconds, self.bytes_sent / seconds / (1024 * 1024)
+
+
+def _file_chunks(path: str, chunk_bytes: int = UPLOAD_CHUNK):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def make_upload(audio, on_progress=None) -> MultipartUpload:
+    """
+    audio - diskdagi fayl yo'li yoki BytesUpload.
+    """
+    if isinstance(audio, BytesUpload):
+        view = memoryview(audio.data)
+        chunks = (view[i:i + UPLOAD_CHUNK] for i in range(0, len(view), UPLOAD_CHUNK))
+        return MultipartUpload(chunks, audio.filename, audio.mime, size=len(view), on_progress=on_progress)
+    mime = mimetypes.guess_type(audio)[0] or "application/octet-stream"
+    if audio.lower().endswith(".flac"):
+        mime = "audio/flac"
+    return MultipartUpload(_file_chunks(audio), os.path.basename(audio), mime, size=os.path.getsize(audio),
+                           on_progress=on_progress)
+
+
+def wav_bytes(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    float32 [-1, 1] PCM -> xotiradagi 16-bit mono WAV.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def split_for_sync(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, max_bytes: int = SYNC_MAX_BYTES):
+    """
+    Audioni sukunat joylaridan WAV hajmi max_bytes dan oshmaydigan bo'laklarga bo'lish
+    (FLAC/Opus bundan kichik bo'ladi). Chegara maqsad nuqtadan +-SEARCH_SEC siljishi
+    mumkin, shuning uchun zaxira qoldiriladi.
+    Natija: [(start_sample, end_sample), ...] - bo'laklar yuborilishidan oldin kodlanadi.
+    """
+    max_sec = (max_bytes - 1024) / (2 * sample_rate)
+    chunk_sec = max(1.0, max_sec - SEARCH_SEC - 1.0)
+    return find_silence_splits(audio, sample_rate, chunk_sec)
+
+
+def encode_chunk(samples: np.ndarray, name: str, codec: str = UPLOAD_CODEC, sample_rate: int = SAMPLE_RATE):
+    """
+    Bitta bo'lak -> BytesUpload. WAV uchun ffmpeg ishga tushirilmaydi.
+    """
+    _args, ext, mime = UPLOAD_CODECS[codec]
+    if codec == "wav":
+        data = wav_bytes(samples, sample_rate)
+    else:
+        data = encode_pcm(samples, codec, sample_rate)
+    return BytesUpload(data, name + ext, mime)
+
+
+def _retry_after(resp, data=None):
+    """
+    Server maslahati: Retry-After sarlavhasi yoki javobdagi retry_after/eta (soniya).
+    """
+    value = resp.headers.get("Retry-After")
+    if value is None and isinstance(data, dict):
+        value = data.get("retry_after", data.get("eta"))
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _server_message(resp):
+    """
+    Xato javobidagi server izohi (JSON error/message/detail yoki matn).
+    """
+    try:
+        data = resp.json()
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        for key in ("error", "message", "detail"):
+            if data.get(key):
+                return str(data[key])
+    return (resp.text or "").strip()[:200]
+
+
+def _result_segments(result):
+    segments = (result or {}).get("segments", [])
+    if not segments:
+        segments = [{"start": 0, "end": 10, "text": (result or {}).get("text", "")}]
+    return segments
+
+
+class MuxlisaClient:
+    """
+    Muxlisa STT mijozi: umumiy requests.Session (ulanishlar qayta ishlatiladi),
+    timeout va qayta urinishlar, asinxron vazifalarni eksponensial oraliq
+    bilan (server maslahatiga qarab) kuzatish. Bir nechta vazifani bitta
+    tsiklda kutish mumkin.
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, max_retries: int = 3, pool_size: int = 8,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests_sent = 0
+        self.last_upload = None  # (baytlar, soniya, MB/s)
+        self.on_upload = None    # callback(baytlar, soniya) - yuklash jarayoni
+        self.session = requests.Session()
+        self.session.headers["x-api-key"] = api_key or os.getenv("MUXLISA_API_KEY") or ""
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, path):
+        self.requests_sent += 1
+        return self.session.get(self.base_url + path, timeout=self.timeout)
+
+    def _post_audio(self, path, audio, on_upload=None):
+        # POST avtomatik qayta urinilmaydi (tana boshidan yuborilishi kerak), shuning uchun qo'lda
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                body = make_upload(audio, on_progress=on_upload or self.on_upload)
+                self.requests_sent += 1
+                resp = self.session.post(self.base_url + path, data=body, timeout=self.timeout,
+                                         headers={"Content-Type": body.content_type})
+                self.last_upload = body.throughput()
+                if resp.status_code not in RETRY_STATUSES:
+                    return resp
+                last_error = MuxlisaError(f"Muxlisa API xatosi: {resp.status_code}")
+                wait = _retry_after(resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                wait = None
+            if attempt < self.max_retries:
+                time.sleep(wait if wait is not None else 0.5 * (2 ** attempt))
+        raise MuxlisaError(f"Muxlisa so'rovi muvaffaqiyatsiz: {last_error}")
+
+    # ---------- sinxron ----------
+    def transcribe_sync(self, audio, on_upload=None):
+        """
+        audio - fayl yo'li yoki BytesUpload (xotiradagi bo'lak).
+        on_upload(baytlar, soniya) - shu so'rov uchun self.on_upload o'rniga.
+        """
+        resp = self._post_audio(SYNC_PATH, audio, on_upload)
+        if resp.status_code != 200:
+            raise MuxlisaError(f"Muxlisa API xatosi: {resp.status_code}")
+        return resp.json().get("result", {}).get("segments", [])
+
+    # ---------- katta fayl: parallel sinxron bo'laklar ----------
+    def _transcribe_chunk(self, audio, start, end, name, codec, sample_rate):
+        # bo'lak shu yerda kodlanadi: xotirada bir vaqtda faqat concurrency ta bo'lak turadi;
+        # qayta urinishlar (429/5xx, ulanish) _post_audio ichida, bir xil baytlar bilan
+        upload = encode_chunk(audio[start:end], name, codec, sample_rate)
+        try:
+            segments = self.transcribe_sync(upload)
+        except (MuxlisaError, ValueError, requests.RequestException) as e:
+            raise MuxlisaError(f"Muxlisa bo'lagi ({upload.filename}) muvaffaqiyatsiz: {e}") from e
+        offset = start / sample_rate
+        duration = (end - start) / sample_rate
+        out = []
+        for seg in segments:
+            seg = dict(seg)
+            seg["start"] = offset + min(float(seg.get("start", 0)), duration)
+            seg["end"] = offset + min(float(seg.get("end", duration)), duration)
+            out.append(seg)
+        return out
+
+    def transcribe_fanout(self, audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                          concurrency: int = FANOUT_CONCURRENCY, max_bytes: int = SYNC_MAX_BYTES,
+                          codec: str = UPLOAD_CODEC, on_chunk=None):
+        """
+        Uzun audio: sukunatdan <=max_bytes bo'laklarga bo'linib, har biri codec ga
+        kodlanib sinxron endpointga bir vaqtda concurrency tagacha yuboriladi.
+        Segmentlar bo'laklar tartibida, vaqtlari bo'lak boshiga surilgan holda qaytadi.
+        on_chunk(tayyor, jami) - jarayon haqida xabar.
+        """
+        chunks = split_for_sync(audio, sample_rate, max_bytes)
+        results = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+            futures = {
+                ex.submit(self._transcribe_chunk, audio, a, b, f"chunk_{i:04d}", codec, sample_rate): i
+                for i, (a, b) in enumerate(chunks)
+            }
+            try:
+                for done, fut in enumerate(as_completed(futures), 1):
+                    results[futures[fut]] = fut.result()
+                    if on_chunk:
+                        on_chunk(done, len(chunks))
+            except Exception:
+                # qayta urinishlardan keyin ham xato - navbatdagilarni yubormaymiz
+                for fut in futures:
+                    fut.cancel()
+                raise
+        return [seg for chunk_segments in results for seg in chunk_segments]
+
+    # ---------- asinxron ----------
+    def submit_async(self, audio, on_upload=None) -> str:
+        resp = self._post_audio(ASYNC_PATH, audio, on_upload)
+        if resp.status_code != 200:
+            raise MuxlisaError(f"Muxlisa Async Upload xatosi: {resp.status_code}")
+        data = resp.json()
+        task_id = data.get("task_id") or data.get("id")
+        if not task_id:
+            raise MuxlisaError("Muxlisa Async: task_id qaytmadi")
+        return str(task_id)
+
+    def poll(self, task_id: str):
+        """
+        Bitta holat so'rovi: (status, natija_yoki_None, server_maslahati_soniya).
+        429/5xx - vaqtinchalik ("error", keyingi urinishda yana so'raladi);
+        boshqa xato (401/403 kalit, 404 vazifa yo'q) - darhol MuxlisaError.
+        """
+        resp = self._get(STATUS_PATH.format(task_id=task_id))
+        if resp.status_code in RETRY_STATUSES:
+            return "error", None, _retry_after(resp)
+        if resp.status_code != 200:
+            raise MuxlisaError(f"Muxlisa Async holat xatosi ({task_id}): {resp.status_code} {_server_message(resp)}")
+        data = resp.json()
+        status = data.get("status")
+        if status == "completed":
+            return status, _result_segments(data.get("result")), None
+        return status, None, _retry_after(resp, data)
+
+    def wait_many(self, task_ids, on_poll=None, initial: float = POLL_INITIAL, max_interval: float = POLL_MAX,
+                  timeout: float = POLL_TIMEOUT):
+        """
+        Bir nechta vazifani bitta tsiklda kutish. Har bir vazifa o'z jadvali
+        bo'yicha so'raladi: oraliq har safar 2 barobar oshadi (max_interval gacha),
+        server Retry-After/eta bersa, o'sha ishlatiladi. 429/5xx va ulanish xatolari
+        qayta so'raladi, qolgan xatolar (401/403/404) vazifani darhol yakunlaydi.
+        Natija: {task_id: segmentlar yoki Exception}
+        """
+        start = time.monotonic()
+        results = {}
+        queue = [(start + initial, tid, initial) for tid in task_ids]
+        heapq.heapify(queue)
+        polls = 0
+        while queue:
+            due, tid, interval = heapq.heappop(queue)
+            now = time.monotonic()
+            if due - start > timeout:
+                results[tid] = MuxlisaError("Muxlisa Async kutish muddati tugadi.")
+                continue
+            if due > now:
+                time.sleep(due - now)
+            polls += 1
+            if on_poll:
+                on_poll(polls, len(results), len(task_ids))
+            try:
+                status, segments, hint = self.poll(tid)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # tarmoq uzilishi - oraliqni oshirib yana so'raymiz
+                print(f"DEBUG: Muxlisa status error ({tid}): {e}")
+                status, segments, hint = "error", None, None
+            except (MuxlisaError, ValueError, requests.RequestException) as e:
+                # qayta so'rash foyda bermaydi - vazifa muddat tugashini kutmaydi
+                results[tid] = e if isinstance(e, MuxlisaError) else MuxlisaError(f"Muxlisa Async holat xatosi: {e}")
+                continue
+            if status == "completed":
+                results[tid] = segments
+            elif status == "failed":
+                results[tid] = MuxlisaError("Muxlisa Async tahlili muvaffaqiyatsiz.")
+            else:
+                next_interval = min(max_interval, interval * 2)
+                delay = min(max_interval, hint) if hint is not None else next_interval
+                heapq.heappush(queue, (time.monotonic() + delay, tid, next_interval))
+        return results
+
+    def wait(self, task_id: str, on_poll=None, **kwargs):
+        result = self.wait_many([task_id], on_poll=on_poll, **kwargs)[task_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def transcribe_async(self, audio, on_poll=None, on_upload=None):
+        return self.wait(self.submit_async(audio, on_upload), on_poll=on_poll)
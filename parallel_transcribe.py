@@ -0,0 +1,138 @@
+import importlib.util
+import os
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from ffmpeg_audio import SAMPLE_RATE, find_silence_splits
+from whisper_cache import get_whisper_model
+
+
+# .env orqali: WHISPER_WORKERS=4, WHISPER_CHUNK_SEC=300
+DEFAULT_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+DEFAULT_CHUNK_SEC = float(os.getenv("WHISPER_CHUNK_SEC", "300"))
+# Bo'laklab tahlil (1): natija worker soniga bog'liq emas, WHISPER_WORKERS=1 da ham bo'laklar
+# (jarayonsiz) ishlatiladi. 0 - butun audio bitta o'tishda (alohida rejim, workerlar ishlatilmaydi)
+CHUNKED = os.getenv("WHISPER_CHUNKED", "1") == "1"
+
+# faster_whisper Segment o'rniga yengil, pickle qilinadigan segment
+Segment = namedtuple("Segment", ["start", "end", "text", "words"], defaults=(None,))
+Word = namedtuple("Word", ["start", "end", "word"])
+
+
+# ---------- worker jarayon ----------
+_worker_model = None
+
+
+def _init_worker(model_name, device, compute_type, cpu_threads):
+    global _worker_model
+    _worker_model = get_whisper_model(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(job):
+    return _transcribe_with(_worker_model, job)
+
+
+def _transcribe_with(model, job):
+    offset, duration, samples, language, beam_size, vad_filter, word_timestamps = job
+    segments, _info = model.transcribe(samples, language=language, beam_size=beam_size, vad_filter=vad_filter,
+                                               word_timestamps=word_timestamps)
+    out = []
+    for seg in segments:
+        start = offset + min(float(seg.start), duration)
+        end = offset + min(float(seg.end), duration)
+        words = None
+        if seg.words:
+            words = [Word(offset + min(float(w.start), duration), offset + min(float(w.end), duration), w.word)
+                     for w in seg.words]
+        out.append(Segment(start, end, seg.text, words))
+    return out
+
+
+# ---------- pool ----------
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def use_worker_main():
+    """
+    spawn (Windows/macOS) da har bir worker __main__ ni qayta ishga tushiradi - bu audio.py,
+    ya'ni Kivy va oyna. Dastur boshida (asosiy threadda, pool yaratilishidan oldin) bir marta
+    chaqiriladi: __main__.__spec__ shu modulga ko'rsatiladi va multiprocessing workerlarda
+    ilova skripti o'rniga faqat shu yengil modulni yuklaydi (init_main_from_name).
+    """
+    sys.modules["__main__"].__spec__ = importlib.util.find_spec(__name__)
+
+
+def _get_pool(workers, model_name, device, compute_type, cpu_threads):
+    # Pool saqlab qo'yiladi: keyingi videolarda workerlardagi model allaqachon yuklangan bo'ladi
+    global _pool, _pool_key
+    key = (workers, model_name, device, compute_type, cpu_threads)
+    with _pool_lock:
+        # worker o'lgan bo'lsa (masalan, model yuklashda xotira yetmadi) pool qayta yaratiladi
+        if _pool is None or _pool_key != key or getattr(_pool, "_broken", False):
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(model_name, device, compute_type, cpu_threads))
+            _pool_key = key
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_key = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool(wait: bool = True):
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            # navbatdagi bo'laklar bekor qilinadi, ishlayotganlari tugashi kutiladi (wait=True)
+            _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+        _pool_key = None
+
+
+def transcribe_parallel(audio: np.ndarray, model_name: str, language=None, workers: int = DEFAULT_WORKERS,
+                        chunk_sec: float = DEFAULT_CHUNK_SEC, device: str = "cpu", compute_type: str = "int8",
+                        beam_size: int = 5, vad_filter: bool = True, word_timestamps: bool = False,
+                        sample_rate: int = SAMPLE_RATE):
+    """
+    Audioni sukunat joylaridan bo'lib, bo'laklarni bir nechta jarayonda
+    transkripsiya qilish. Segmentlar bo'laklar tartibida, vaqtlari
+    surilgan holda generator sifatida qaytadi (model.transcribe kabi).
+    workers=1 da bo'laklar shu jarayonda ketma-ket tahlil qilinadi - natija bir xil.
+    """
+    workers = max(1, int(workers))
+    jobs = []
+    for a, b in find_silence_splits(audio, sample_rate, chunk_sec):
+        offset = a / sample_rate
+        duration = (b - a) / sample_rate
+        jobs.append((offset, duration, audio[a:b], language, beam_size, vad_filter, word_timestamps))
+
+    if workers == 1:
+        model = get_whisper_model(model_name, device=device, compute_type=compute_type)
+        for job in jobs:
+            yield from _transcribe_with(model, job)
+        return
+
+    cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    pool = _get_pool(workers, model_name, device, compute_type, cpu_threads)
+    try:
+        # natijalar topshirilgan tartibda keladi, worker soni natijaga ta'sir qilmaydi
+        for chunk_segments in pool.map(_transcribe_chunk, jobs):
+            yield from chunk_segments
+    except BrokenProcessPool as e:
+        # keyingi transkripsiya yangi pool bilan boshlanadi (ilovani qayta ochish shart emas)
+        _discard_pool(pool)
+        raise RuntimeError(f"Whisper workeri to'xtab qoldi (xotira yetmadimi?): {e}") from e
@@ -0,0 +1,488 @@
+"""
+Transkripsiya konveyeri GUI'siz: ffmpeg -> Whisper/Muxlisa -> Gemini -> SRT.
+Kivy import qilinmaydi, shuning uchun serverda va cron'da ishlatish mumkin.
+
+    python pipeline.py video.mp4 papka/ https://youtu.be/... --jobs 2 --provider whisper --model small
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import srt
+from dotenv import load_dotenv
+
+from ffmpeg_audio import SAMPLE_RATE, encode_audio_file, encoded_path_for, probe_duration, read_audio_pcm
+from progress import StageProgress, sec_to_hhmmss, ytdlp_hook
+from gemini_refine import DEFAULT_MODEL, PROMPT_VERSION, RefineCache, gemini_generate_fn, refine_lines
+from parallel_transcribe import CHUNKED, DEFAULT_CHUNK_SEC, DEFAULT_WORKERS, Segment, transcribe_parallel, use_worker_main
+from transcript_cache import TranscriptCache, transcript_key
+from transcript_library import TranscriptLibrary, find_media_for
+from whisper_cache import get_whisper_model
+from word_index import WORD_TIMESTAMPS, WordIndex, words_path_for
+
+
+GEMINI_MODEL = DEFAULT_MODEL
+MEDIA_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm", ".mp3", ".m4a", ".wav", ".flac", ".ogg")
+
+
+# ---------- yordamchi funksiyalar ----------
+def make_srt_from_segments(segments, srt_path: str):
+    subs = []
+    i = 1
+    for seg in segments:
+        start = float(seg.start)
+        end = float(seg.end)
+        text = (seg.text or "").strip()
+        if not text:
+            continue
+        subs.append(
+            srt.Subtitle(
+                index=i,
+                start=timedelta(seconds=start),
+                end=timedelta(seconds=end),
+                content=text
+            )
+        )
+        i += 1
+    data = srt.compose(subs)
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+
+def append_srt_block(f, index: int, start: float, end: float, text: str):
+    """
+    Bitta segmentni ochiq SRT faylga qo'shish (transkripsiya davomida).
+    """
+    sub = srt.Subtitle(
+        index=index,
+        start=timedelta(seconds=float(start)),
+        end=timedelta(seconds=float(end)),
+        content=text
+    )
+    f.write(sub.to_srt())
+    f.flush()
+    return sub
+
+
+def load_srt_items(srt_path: str):
+    with open(srt_path, "r", encoding="utf-8", errors="ignore") as f:
+        data = f.read()
+    subs = list(srt.parse(data))
+    items = []
+    for sub in subs:
+        start_sec = sub.start.total_seconds()
+        end_sec = sub.end.total_seconds()
+        txt = sub.content.replace("\n", " ").strip()
+        items.append((start_sec, end_sec, txt))
+    return items
+
+
+def _no_cancel():
+    pass
+
+
+def muxlisa_segments(segments):
+    # Muxlisa javobidagi dict'lar -> Whisper segmentlari bilan bir xil ko'rinish
+    return [Segment(float(s.get("start", 0)), float(s.get("end", 5)), s.get("text", "")) for s in segments]
+
+
+class Pipeline:
+    """
+    Bitta media fayl uchun to'liq jarayon. Sozlamalar konstruktorda, keshlar
+    va Muxlisa mijozi bir nechta fayl (va thread) orasida umumiy.
+    on_status(matn) - holat xabarlari (GUI status satri yoki konsol).
+    on_progress(StageProgress) - bosqich foizi, tezligi va ETA si.
+    library berilsa, tayyor transkriptlar umumiy qidiruv arxiviga qo'shiladi.
+    """
+
+    def __init__(self, provider: str = "whisper", whisper_model: str = "small", language: str = "auto",
+                 workers: int = DEFAULT_WORKERS, chunk_sec: float = DEFAULT_CHUNK_SEC, chunked: bool = CHUNKED,
+                 word_timestamps: bool = WORD_TIMESTAMPS, refine: bool = True, progressive: bool = True,
+                 transcript_cache: TranscriptCache = None, refine_cache: RefineCache = None,
+                 library: TranscriptLibrary = None, muxlisa=None, on_status=None, on_progress=None):
+        self.provider = provider
+        self.whisper_model = whisper_model
+        self.language = language
+        self.workers = int(workers)
+        self.chunk_sec = float(chunk_sec)
+        self.chunked = chunked
+        self.word_timestamps = word_timestamps
+        self.refine = refine
+        self.progressive = progressive
+        self.transcript_cache = transcript_cache if transcript_cache is not None else TranscriptCache()
+        self.refine_cache = refine_cache
+        self.library = library
+        self._muxlisa = muxlisa
+        self.on_status = on_status
+        self.on_progress = on_progress
+
+    def status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def stage(self, name: str, total: float = None, unit: str = "s") -> StageProgress:
+        """
+        Yangi bosqich darhol e'lon qilinadi: birinchi natijasigacha (model yuklash,
+        yuklash, navbat) oldingi tugagan bosqich "to'xtab qolgan" bo'lib ko'rinmaydi.
+        """
+        def on_update(progress):
+            self.status("Holat: " + progress.format())
+            if self.on_progress:
+                self.on_progress(progress)
+        progress = StageProgress(name, total, unit, on_update=on_update)
+        progress.update(force=True)
+        return progress
+
+    def muxlisa(self):
+        if self._muxlisa is None:
+            from muxlisa_client import MuxlisaClient
+            self._muxlisa = MuxlisaClient()
+        return self._muxlisa
+
+    # ---------- kesh ----------
+    def _refine_tag(self, refined=True):
+        # prompt versiyasi ham kalitda: REFINE_PROMPT o'zgarsa eski tuzatilgan transkriptlar ishlatilmaydi
+        if self.provider != "muxlisa" and self.refine and refined:
+            return f"{GEMINI_MODEL}:{PROMPT_VERSION}"
+        return "none"
+
+    def transcript_key(self, source, refine_tag):
+        media_hash = self.transcript_cache.media_hash(source)
+        if self.provider == "muxlisa":
+            return transcript_key(media_hash, "muxlisa", refine=refine_tag)
+        # bo'laklab va bitta o'tishdagi natijalar farq qiladi - kalitda rejim ham bor
+        model = f"{self.whisper_model}@chunk{self.chunk_sec:g}" if self.chunked else self.whisper_model
+        return transcript_key(media_hash, "whisper", model, self.language, refine_tag)
+
+    def load_cached(self, source, srt_path) -> bool:
+        key = self.transcript_key(source, self._refine_tag())
+        cached = self.transcript_cache.get(key)
+        if not cached:
+            return False
+        shutil.copyfile(cached, srt_path)
+        # nomi o'zgargan / nusxalangan fayl ham so'z darajasidagi sakrashni yo'qotmaydi
+        words_path = words_path_for(srt_path)
+        cached_words = self.transcript_cache.get_words(key)
+        if cached_words:
+            shutil.copyfile(cached_words, words_path)
+        elif os.path.exists(words_path):
+            # boshqa transkriptdan qolgan so'z vaqtlari bu SRT ga mos emas
+            os.remove(words_path)
+        return True
+
+    # ---------- STT ----------
+    def transcribe_whisper(self, source, srt_path, on_segment=None, check=_no_cancel, stats=None):
+        """
+        Natija: (subs, WordIndex yoki None). progressive bo'lsa segmentlar
+        kelishi bilan SRT ga yoziladi va on_segment(item) chaqiriladi.
+        check() har segmentdan keyin chaqiriladi (bekor qilish uchun JobCancelled).
+        stats (dict) ga audio uzunligi yoziladi: stats["audio_sec"].
+        """
+        stats = stats if stats is not None else {}
+        self.status(f"Holat: Whisper ({self.whisper_model}) tahlil...")
+        language = None if self.language == "auto" else self.language
+        # PCM to'g'ridan-to'g'ri ffmpeg stdout dan, oraliq WAV faylsiz
+        decode = self.stage("FFmpeg", probe_duration(source))
+        audio = read_audio_pcm(source, on_progress=lambda sec: decode.update(done=sec))
+        decode.finish()
+        stats["audio_sec"] = len(audio) / SAMPLE_RATE
+        check()
+        # foiz: oxirgi segment oxiri / audio davomiyligi; bosqich model yuklanishidan oldin boshlanadi
+        progress = self.stage(f"Whisper ({self.whisper_model})", stats["audio_sec"])
+        if self.chunked:
+            # Uzun audio sukunat joylaridan bo'linib, bir nechta jarayonda (workers=1 - shu jarayonda)
+            # tahlil qilinadi; SRT worker soniga bog'liq emas
+            segments = transcribe_parallel(audio, self.whisper_model, language=language, workers=self.workers,
+                                           chunk_sec=self.chunk_sec, word_timestamps=self.word_timestamps)
+        else:
+            model = get_whisper_model(self.whisper_model, device="cpu", compute_type="int8")
+            segments, info = model.transcribe(audio, language=language, beam_size=5, vad_filter=True,
+                                              word_timestamps=self.word_timestamps)
+            progress.update(total=getattr(info, "duration", None))
+        # So'z vaqtlari segmentlar bilan bir xil tartibda (bo'sh segmentlarsiz) yig'iladi
+        words = WordIndex() if self.word_timestamps else None
+        subs = []
+        # .part ga yoziladi va faqat muvaffaqiyatda SRT o'rniga qo'yiladi: chala SRT keyingi
+        # ochilishda tayyor transkript deb yuklanmaydi, oldingi tayyor SRT ham buzilmaydi
+        part_path = srt_path + ".part"
+        f = open(part_path, "w", encoding="utf-8") if self.progressive else None
+        try:
+            for seg in segments:
+                text = (seg.text or "").strip()
+                if not text:
+                    continue
+                if words is not None:
+                    words.add_segment(seg.words)
+                if f is not None:
+                    subs.append(append_srt_block(f, len(subs) + 1, seg.start, seg.end, text))
+                else:
+                    subs.append(srt.Subtitle(index=len(subs) + 1, start=timedelta(seconds=float(seg.start)),
+                                             end=timedelta(seconds=float(seg.end)), content=text))
+                if on_segment:
+                    on_segment((float(seg.start), float(seg.end), text))
+                progress.update(done=float(seg.end))
+                check()
+            if f is not None:
+                f.close()
+                os.replace(part_path, srt_path)
+        except BaseException:
+            if f is not None:
+                f.close()
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            raise
+        finally:
+            # generator yopilsa, qolgan audio dekodlanmaydi
+            close = getattr(segments, "close", None)
+            if close:
+                close()
+        progress.finish()
+        return subs, words
+
+    def transcribe_muxlisa(self, source, srt_path, check=_no_cancel, stats=None):
+        # requests/urllib3 faqat Muxlisa tanlanganda yuklanadi
+        from muxlisa_client import FANOUT, SYNC_MAX_BYTES, UPLOAD_CODEC
+        duration = probe_duration(source)
+        if stats is not None:
+            stats["audio_sec"] = duration
+        client = self.muxlisa()
+        if FANOUT:
+            # Sinxron endpointga parallel <=5 MB bo'laklar: PCM bir marta dekodlanadi,
+            # har bir bo'lak yuborilishidan oldin alohida kodlanadi (butun fayl kodlanmaydi)
+            self.status("Holat: Audio tayyorlanmoqda (FFmpeg)...")
+            decode = self.stage("FFmpeg", duration)
+            audio = read_audio_pcm(source, on_progress=lambda sec: decode.update(done=sec))
+            decode.finish()
+            check()
+            chunks = self.stage(f"Muxlisa ({UPLOAD_CODEC})", unit="bo'lak")
+            def on_chunk(done, total):
+                chunks.update(done=done, total=total, force=done == total)
+            segments = client.transcribe_fanout(audio, codec=UPLOAD_CODEC, on_chunk=on_chunk)
+        else:
+            # Muxlisa fayl yuklashni talab qiladi: WAV o'rniga siqilgan audio (FLAC/Opus)
+            self.status(f"Holat: Audio tayyorlanmoqda (FFmpeg, {UPLOAD_CODEC})...")
+            audio_path = encoded_path_for(srt_path, UPLOAD_CODEC)
+            encode = self.stage(f"FFmpeg ({UPLOAD_CODEC})", duration)
+            encode_audio_file(source, audio_path, UPLOAD_CODEC, on_progress=lambda sec: encode.update(done=sec))
+            encode.finish()
+            check()
+            size = os.path.getsize(audio_path)
+            upload = self.stage(f"Muxlisa yuklash ({UPLOAD_CODEC})", size, unit="B")
+            def on_upload(sent, seconds):
+                upload.update(done=sent)
+                if client.on_upload:
+                    client.on_upload(sent, seconds)
+            if size <= SYNC_MAX_BYTES:
+                segments = client.transcribe_sync(audio_path, on_upload=on_upload)
+            else:
+                # navbat bosqichi: har bir holat so'rovi jarayon belgisi (server javob beryapti)
+                polls_stage = []
+                def on_poll(polls, done, total):
+                    if not polls_stage:
+                        upload.finish()
+                        polls_stage.append(self.stage("Muxlisa navbat", unit="so'rov"))
+                    polls_stage[0].update(done=polls)
+                    self.status(f"Holat: Muxlisa tahlil ({polls})...")
+                segments = client.transcribe_async(audio_path, on_poll=on_poll, on_upload=on_upload)
+        return [
+            srt.Subtitle(index=i, start=timedelta(seconds=seg.start), end=timedelta(seconds=seg.end),
+                         content=seg.text.strip())
+            for i, seg in enumerate(muxlisa_segments(segments), 1)
+        ]
+
+    # ---------- Gemini ----------
+    def refine_subs(self, subs):
+        """
+        Natija: (subs, hamma qator tuzatildimi). Xato bo'lsa original matn qoladi.
+        """
+        try:
+            self.status("Holat: AI tahlil...")
+            # Butun transkript token chegarasi bo'yicha bo'laklanib, parallel yuboriladi
+            lines = [(i, s.content) for i, s in enumerate(subs)]
+            generate = gemini_generate_fn(GEMINI_MODEL)
+            stage = self.stage("Gemini", len(lines), unit="qator")
+            def progress(done, total):
+                stage.update(done=done, total=total)
+            refined, failed = refine_lines(lines, generate, on_progress=progress,
+                                           cache=self.refine_cache, model=GEMINI_MODEL)
+            for idx, text in refined.items():
+                subs[idx].content = text
+            stage.finish()
+            if failed:
+                self.status(f"Holat: AI tahlili yakunlandi ({failed} qator tuzatilmadi)")
+            else:
+                self.status("Holat: AI tahlili yakunlandi")
+            return subs, failed == 0
+        except Exception as e:
+            print(f"DEBUG: Gemini refinement error: {e}")
+            self.status("Faqat original matn qoldi (Gemini xatosi)")
+            return subs, False
+
+    def add_to_library(self, source, srt_path):
+        if self.library is None:
+            return
+        try:
+            # video SRT yonida bo'lmasa (--out-dir), manba faylning o'zi
+            self.library.add_srt(srt_path, find_media_for(srt_path, source), force=True)
+        except Exception as e:
+            print(f"DEBUG: Library ingest error: {e}")
+
+    # ---------- to'liq jarayon ----------
+    def process(self, source, srt_path=None, on_segment=None, job=None):
+        """
+        source -> SRT. Natija: {"srt_path", "segments", "cached", "refined", "timings", "audio_sec"}
+        timings - bosqichlar bo'yicha soniyalar (stt, refine, total).
+        job (job_scheduler.Job) berilsa, bosqichlar va segmentlar orasida
+        bekor qilinganligi tekshiriladi.
+        """
+        check = job.check if job is not None else _no_cancel
+        srt_path = srt_path or os.path.splitext(source)[0] + ".srt"
+        t0 = time.perf_counter()
+        timings = {}
+        # Shu media + sozlamalar uchun tayyor transkript bo'lsa, FFmpeg/STT/Gemini o'tkazib yuboriladi
+        if self.load_cached(source, srt_path):
+            self.add_to_library(source, srt_path)
+            timings["total"] = time.perf_counter() - t0
+            return {"srt_path": srt_path, "segments": None, "cached": True, "refined": None, "timings": timings,
+                    "audio_sec": None}
+
+        self.status("Holat: Matnga o'girish jarayoni (AI)...")
+        words = None
+        refined = False
+        stats = {}
+        if self.provider == "muxlisa":
+            subs = self.transcribe_muxlisa(source, srt_path, check, stats)
+        else:
+            subs, words = self.transcribe_whisper(source, srt_path, on_segment, check, stats)
+        timings["stt"] = time.perf_counter() - t0
+        check()
+
+        if subs and self.provider != "muxlisa" and self.refine:
+            t1 = time.perf_counter()
+            subs, refined = self.refine_subs(subs)
+            timings["refine"] = time.perf_counter() - t1
+            check()
+
+        if subs:
+            with open(srt_path, "w", encoding="utf-8") as f:
+                f.write(srt.compose(subs))
+            words_path = None
+            if words is not None:
+                words_path = words_path_for(srt_path)
+                words.save(words_path)
+            # qisman tuzatilgan matn keshlanmaydi: "none" kaliti xom transkript uchun
+            # (--no-refine, Tk ilovalari), keyingi safar Gemini qayta urinadi
+            if refined or not self.refine or self.provider == "muxlisa":
+                self.transcript_cache.put(self.transcript_key(source, self._refine_tag(refined)), srt_path,
+                                          words_path)
+            self.add_to_library(source, srt_path)
+        timings["total"] = time.perf_counter() - t0
+        return {"srt_path": srt_path, "segments": len(subs), "cached": False, "refined": refined, "timings": timings,
+                "audio_sec": stats.get("audio_sec")}
+
+
+# ---------- CLI ----------
+def collect_inputs(paths):
+    """
+    Fayllar, papkalar (ichidagi media fayllar) va URL'lar -> ro'yxat.
+    """
+    out = []
+    for p in paths:
+        if p.startswith(("http://", "https://")):
+            out.append(p)
+        elif os.path.isdir(p):
+            for root, _dirs, files in os.walk(p):
+                for name in sorted(files):
+                    stem, ext = os.path.splitext(name.lower())
+                    # oldingi ishga tushirishlardan qolgan oraliq audio fayllar o'tkazib yuboriladi
+                    if ext in MEDIA_EXTENSIONS and not stem.endswith(("_audio", ".audio")):
+                        out.append(os.path.join(root, name))
+        else:
+            out.append(p)
+    return out
+
+
+def process_input(pipeline: Pipeline, item: str, out_dir: str = None):
+    if item.startswith(("http://", "https://")):
+        # URL: faqat audio oqimi yuklanadi, video kerak emas
+        from youtube_ingest import download_audio
+        source, base_path = download_audio(item, progress_hooks=[ytdlp_hook(pipeline.stage("Yuklash", unit="B"))])
+        srt_path = base_path + ".srt"
+    else:
+        source = item
+        srt_path = os.path.splitext(item)[0] + ".srt"
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        srt_path = os.path.join(out_dir, os.path.basename(srt_path))
+    return pipeline.process(source, srt_path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Video/audio -> SRT (GUI'siz)")
+    ap.add_argument("inputs", nargs="+", help="fayllar, papkalar yoki URL'lar")
+    ap.add_argument("--provider", choices=["whisper", "muxlisa"], default="whisper")
+    ap.add_argument("--model", default="small", help="Whisper modeli")
+    ap.add_argument("--lang", default="auto")
+    ap.add_argument("--jobs", type=int, default=1, help="bir vaqtda ishlanadigan fayllar soni")
+    ap.add_argument("--whisper-workers", type=int, default=DEFAULT_WORKERS, help="bitta fayl ichidagi jarayonlar")
+    ap.add_argument("--chunk-sec", type=float, default=DEFAULT_CHUNK_SEC)
+    ap.add_argument("--no-chunks", action="store_true",
+                    help="audio bitta o'tishda (natija bo'laklab tahlildan farq qiladi, --whisper-workers ishlatilmaydi)")
+    ap.add_argument("--no-refine", action="store_true", help="Gemini tuzatishsiz")
+    ap.add_argument("--out-dir", default=None, help="SRT fayllar papkasi (standart: media yonida)")
+    ap.add_argument("--no-library", action="store_true", help="transkriptlarni qidiruv arxiviga qo'shmaslik")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    load_dotenv()
+    items = collect_inputs(args.inputs)
+    if not items:
+        print("Media fayl topilmadi", file=sys.stderr)
+        return 1
+
+    def on_status(text):
+        if args.verbose:
+            print(text, file=sys.stderr)
+
+    # Keshlar va Muxlisa sessiyasi barcha fayllar uchun umumiy
+    pipeline = Pipeline(provider=args.provider, whisper_model=args.model, language=args.lang,
+                        workers=args.whisper_workers, chunk_sec=args.chunk_sec, chunked=CHUNKED and not args.no_chunks,
+                        refine=not args.no_refine,
+                        progressive=False, refine_cache=None if args.no_refine else RefineCache(),
+                        library=None if args.no_library else TranscriptLibrary(), on_status=on_status)
+
+    t0 = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        futures = {ex.submit(process_input, pipeline, item, args.out_dir): item for item in items}
+        for fut in as_completed(futures):
+            item = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"[xato] {item}: {e}")
+                if args.verbose:
+                    traceback.print_exc()
+                continue
+            t = result["timings"]
+            if result["cached"]:
+                print(f"[kesh] {item} -> {result['srt_path']} {t['total']:.2f} s")
+            else:
+                parts = " ".join(f"{k}={v:.1f}s" for k, v in t.items() if k != "total")
+                if result["audio_sec"]:
+                    # audio soniyasi / STT soniyasi - partiya oynasini rejalashtirish uchun
+                    parts += f", audio={sec_to_hhmmss(result['audio_sec'])} {result['audio_sec'] / t['stt']:.1f}x"
+                print(f"[ok] {item} -> {result['srt_path']} {t['total']:.1f} s ({parts}, {result['segments']} segment)")
+    print(f"Jami: {len(items)} fayl, {failed} xato, {time.perf_counter() - t0:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    use_worker_main()
+    sys.exit(main())
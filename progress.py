@@ -0,0 +1,111 @@
+import threading
+import time
+
+
+STALL_SEC = 60.0  # shuncha vaqt yangilanmasa ish "to'xtab qolgan" deb ko'rsatiladi
+
+
+def sec_to_hhmmss(sec: float) -> str:
+    # pipeline, gemini_summary va transcript_library ham shu funksiyani ishlatadi
+    # (bu modul hech narsani import qilmaydi - aylana import bo'lmaydi)
+    sec = max(0.0, float(sec))
+    h = int(sec // 3600)
+    m = int((sec % 3600) // 60)
+    s_ = int(sec % 60)
+    return f"{h:02d}:{m:02d}:{s_:02d}"
+
+
+class StageProgress:
+    """
+    Bitta bosqich jarayoni: bajarilgan/jami -> foiz, tezlik va ETA.
+    unit: "s" - audio soniyalari (tezlik real vaqtga nisbatan, masalan 3.2x),
+    "B" - baytlar (MB/s), boshqasi - dona (qator, bo'lak).
+    on_update(progress) ko'pi bilan min_interval soniyada bir marta chaqiriladi.
+    """
+
+    def __init__(self, stage: str, total: float = None, unit: str = "s", on_update=None,
+                 min_interval: float = 0.5):
+        self.stage = stage
+        self.total = total if total and total > 0 else None
+        self.unit = unit
+        self.on_update = on_update
+        self.min_interval = min_interval
+        self.done = 0.0
+        self.started = time.monotonic()
+        self.updated = self.started
+        self._emitted = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, done: float = None, advance: float = None, total: float = None, force: bool = False):
+        with self._lock:
+            if total and total > 0:
+                self.total = total
+            if done is not None:
+                self.done = float(done)
+            elif advance is not None:
+                self.done += advance
+            now = time.monotonic()
+            self.updated = now
+            emit = force or now - self._emitted >= self.min_interval
+            if emit:
+                self._emitted = now
+        if emit and self.on_update:
+            self.on_update(self)
+
+    def finish(self):
+        self.update(done=self.total if self.total else self.done, force=True)
+
+    @property
+    def elapsed(self) -> float:
+        return max(1e-6, time.monotonic() - self.started)
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    @property
+    def rate(self) -> float:
+        # birlik/soniya; unit == "s" bo'lsa bu real vaqt koeffitsienti (RTF ning teskarisi)
+        return self.done / self.elapsed
+
+    @property
+    def eta(self):
+        if not self.total or self.done <= 0:
+            return None
+        return max(0.0, (self.total - self.done) / self.rate)
+
+    def stalled(self, threshold: float = STALL_SEC) -> bool:
+        return time.monotonic() - self.updated > threshold
+
+    def format(self) -> str:
+        parts = [self.stage + ":"]
+        if self.fraction is not None:
+            parts.append(f"{self.fraction * 100:.0f}%")
+        if self.unit == "s":
+            parts.append(f"{sec_to_hhmmss(self.done)}" + (f"/{sec_to_hhmmss(self.total)}" if self.total else ""))
+            parts.append(f"{self.rate:.1f}x")
+        elif self.unit == "B":
+            mb = 1024 * 1024
+            parts.append(f"{self.done / mb:.1f}" + (f"/{self.total / mb:.1f}" if self.total else "") + " MB")
+            parts.append(f"{self.rate / mb:.1f} MB/s")
+        else:
+            parts.append(f"{self.done:.0f}" + (f"/{self.total:.0f}" if self.total else "") + f" {self.unit}")
+        eta = self.eta
+        if eta is not None:
+            parts.append(f"ETA {sec_to_hhmmss(eta)}")
+        return " ".join(parts)
+
+
+def ytdlp_hook(progress: StageProgress):
+    """
+    yt_dlp progress_hooks uchun funksiya: baytlar StageProgress ga uzatiladi.
+    """
+    def hook(d):
+        if d.get("status") == "downloading":
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            progress.update(done=d.get("downloaded_bytes") or 0, total=total)
+        elif d.get("status") == "finished":
+            progress.finish()
+    return hook
@@ -0,0 +1,241 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from uz_normalize import normalize_uz
+
+
+# So'z ichidagi apostroflar (o'zbekcha o', g', ma'no) so'zning bir qismi hisoblanadi
+TOKEN_RE = re.compile(r"\w+(?:['‘’ʻʼ`]\w+)*")
+
+
+APOSTROPHE_RE = re.compile(r"['‘’ʻʼ`]")
+DOUBLE_RE = re.compile(r"(.)\1+")
+
+FUZZY_MIN_OVERLAP = 0.5   # so'rov trigrammalarining kamida yarmi so'zda bo'lsin
+FUZZY_MIN_SCORE = 0.6     # tahrir masofasi bo'yicha o'xshashlik chegarasi
+FUZZY_MAX_CANDIDATES = 64  # har bir so'rov so'zi uchun tekshiriladigan nomzodlar
+
+
+def tokenize(text: str):
+    # kirill/lotin, apostrof variantlari va tinish belgilari bir xil ko'rinishga keltiriladi
+    return TOKEN_RE.findall(normalize_uz(text))
+
+
+def fuzzy_fold(word: str) -> str:
+    """
+    Taxminiy qidiruv kaliti: apostroflar olib tashlanadi (o'/o‘/oʻ -> o),
+    ikkilangan harflar bittaga qisqaradi (katta -> kata).
+    """
+    return DOUBLE_RE.sub(r"\1", APOSTROPHE_RE.sub("", word))
+
+
+def trigrams(key: str):
+    # faqat boshiga to'ldiruvchi qo'yamiz - qo'shimchalar (kitob-lar) o'xshashlikni buzmaydi
+    padded = "$$" + key
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_edit_distance(query: str, word: str) -> int:
+    """
+    query va word ning istalgan prefiksi orasidagi eng kichik Levenshtein masofasi.
+    """
+    prev = list(range(len(word) + 1))
+    for i, qc in enumerate(query, 1):
+        cur = [i]
+        for j, wc in enumerate(word, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (qc != wc)))
+        prev = cur
+    return min(prev)
+
+
+class TranscriptIndex:
+    """
+    Transkript segmentlari bo'yicha teskari indeks: token -> {segment_id: [pozitsiyalar]}.
+    Qidiruv vaqti butun matnga emas, faqat mos posting ro'yxatlariga bog'liq.
+    add() transkripsiya threadidan, search() UI threadidan chaqiriladi - ikkalasi bitta qulf ostida.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.n_segments = 0
+        self._vocab = None  # prefiks qidiruv uchun saralangan lug'at (kerak bo'lganda quriladi)
+        self._trigrams = None  # trigramma -> {so'zlar}, taxminiy qidiruv uchun
+        self._folded = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_items(cls, items, fuzzy: bool = True):
+        index = cls()
+        for seg_id, (st, en, txt) in enumerate(items):
+            index.add(seg_id, txt)
+        if fuzzy:
+            # transkript yuklanayotganda (fon thread) quriladi, birinchi so'rov kutmaydi
+            index.build_trigrams()
+        return index
+
+    @classmethod
+    def from_postings(cls, postings, n_segments: int):
+        """
+        Tayyor (masalan, segment_store dan mmap qilingan) posting ro'yxatlari bilan indeks.
+        Trigrammalar birinchi taxminiy qidiruvda quriladi.
+        """
+        index = cls()
+        index.postings = postings
+        index.n_segments = n_segments
+        return index
+
+    def add(self, seg_id: int, text: str):
+        with self._lock:
+            self._add(seg_id, text)
+
+    def _add(self, seg_id: int, text: str):
+        if not isinstance(self.postings, dict):
+            # faqat o'qiladigan postinglar - o'zgartirishdan oldin xotiraga olinadi
+            self.postings = {tok: dict(segs) for tok, segs in self.postings.items()}
+        for pos, tok in enumerate(TOKEN_RE.findall(normalize_uz(text))):
+            if tok not in self.postings and self._trigrams is not None:
+                self._index_trigrams(tok)
+            self.postings.setdefault(tok, {}).setdefault(seg_id, []).append(pos)
+        self.n_segments = max(self.n_segments, seg_id + 1)
+        self._vocab = None
+
+    def _sorted_vocab(self):
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        return self._vocab
+
+    def _prefix_segments(self, prefix: str):
+        vocab = self._sorted_vocab()
+        i = bisect_left(vocab, prefix)
+        found = set()
+        while i < len(vocab) and vocab[i].startswith(prefix):
+            found.update(self.postings[vocab[i]])
+            i += 1
+        return found
+
+    def search_words(self, tokens, prefix: bool = True):
+        """
+        Barcha so'zlar (AND) uchragan segmentlar. prefix=True bo'lsa
+        'kitob' so'rovi 'kitoblar', 'kitobni' ni ham topadi.
+        """
+        if not tokens:
+            return []
+        if prefix:
+            sets = [self._prefix_segments(tok) for tok in tokens]
+        else:
+            sets = [set(self.postings.get(tok, ())) for tok in tokens]
+        sets.sort(key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            if not result:
+                break
+            result = result & other
+        return sorted(result)
+
+    def search_phrase(self, tokens):
+        """
+        So'zlar aynan shu tartibda, yonma-yon kelgan segmentlar (butun so'z bo'yicha).
+        """
+        if not tokens:
+            return []
+        lists = [self.postings.get(tok) for tok in tokens]
+        if any(p is None for p in lists):
+            return []
+        if len(tokens) == 1:
+            return sorted(lists[0])
+
+        candidates = set(min(lists, key=len))
+        for p in lists:
+            candidates.intersection_update(p)
+            if not candidates:
+                return []
+
+        found = []
+        for seg_id in sorted(candidates):
+            rest = [set(p[seg_id]) for p in lists[1:]]
+            for pos in lists[0][seg_id]:
+                if all(pos + k in rest[k - 1] for k in range(1, len(tokens))):
+                    found.append(seg_id)
+                    break
+        return found
+
+    def build_trigrams(self):
+        self._trigrams = {}
+        for word in self.postings:
+            self._index_trigrams(word)
+
+    def _index_trigrams(self, word: str):
+        key = fuzzy_fold(word)
+        self._folded[word] = key
+        for g in trigrams(key):
+            self._trigrams.setdefault(g, set()).add(word)
+
+    def _similar_words(self, token: str):
+        if self._trigrams is None:
+            self.build_trigrams()
+
+        key = fuzzy_fold(token)
+        grams = trigrams(key)
+        if not key or not grams:
+            return []
+        shared = Counter()
+        for g in grams:
+            shared.update(self._trigrams.get(g, ()))
+
+        need = FUZZY_MIN_OVERLAP * len(grams)
+        candidates = [(n, w) for w, n in shared.items() if n >= need]
+        candidates.sort(key=lambda c: (-c[0], len(c[1]), c[1]))
+
+        found = []
+        for n, word in candidates[:FUZZY_MAX_CANDIDATES]:
+            wkey = self._folded[word]
+            dist = prefix_edit_distance(key, wkey)
+            # qo'shimchasiz aniq moslik yuqoriroq turadi
+            score = 1.0 - dist / len(key) - 0.01 * max(0, len(wkey) - len(key))
+            if score >= FUZZY_MIN_SCORE:
+                found.append((word, score))
+        return found
+
+    def search_fuzzy(self, query: str, limit: int = 500):
+        """
+        Xatoli yozuvlarga chidamli qidiruv. Har bir so'rov so'zi uchun lug'atdan
+        trigramma bo'yicha nomzodlar olinadi va tahrir masofasi bilan baholanadi.
+        Natija: [(segment_id, ball), ...] - eng yaxshisi birinchi.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total = None
+        for tok in tokens:
+            best = {}
+            for word, score in self._similar_words(tok):
+                for seg_id in self.postings[word]:
+                    if score > best.get(seg_id, 0.0):
+                        best[seg_id] = score
+            if total is None:
+                total = best
+            else:
+                total = {seg_id: sc + best[seg_id] for seg_id, sc in total.items() if seg_id in best}
+            if not total:
+                return []
+        ranked = sorted(total.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(seg_id, sc / len(tokens)) for seg_id, sc in ranked]
+
+    def search(self, query: str, mode: str = "contains"):
+        """
+        mode="contains" - barcha so'zlar (prefiks bo'yicha) uchragan segmentlar,
+        mode="exact"    - aniq ibora / butun so'z,
+        mode="fuzzy"    - taxminiy (xatoli yozuvlar), eng o'xshashi birinchi.
+        """
+        with self._lock:
+            return self._search(query, mode)
+
+    def _search(self, query: str, mode: str):
+        if mode == "fuzzy":
+            return [seg_id for seg_id, _ in self.search_fuzzy(query)]
+        tokens = tokenize(query)
+        if mode == "exact":
+            return self.search_phrase(tokens)
+        return self.search_words(tokens, prefix=True)
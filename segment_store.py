@@ -0,0 +1,228 @@
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from search_index import TranscriptIndex
+
+
+# SRT almashinuv formati bo'lib qoladi; bu fayl faqat tez ochish uchun (o'chirilsa qayta quriladi)
+MAGIC = b"IVSPSEG1"
+VERSION = 1
+# magic, versiya, segmentlar, lug'at hajmi, SRT hajmi, SRT mtime_ns
+HEADER = struct.Struct("<8sIIIqq")
+SECTIONS = ("starts", "ends", "text_offsets", "text_blob",
+            "vocab_offsets", "vocab_blob", "post_ptr", "post_seg", "pos_ptr", "positions")
+SECTION = struct.Struct("<QQ")
+DTYPES = {
+    "starts": np.float64, "ends": np.float64, "text_offsets": np.uint32, "text_blob": np.uint8,
+    "vocab_offsets": np.uint32, "vocab_blob": np.uint8, "post_ptr": np.uint32, "post_seg": np.uint32,
+    "pos_ptr": np.uint32, "positions": np.uint32,
+}
+ALIGN = 8
+
+
+def segments_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + ".segments.bin"
+
+
+def _pack_strings(strings):
+    blob = bytearray()
+    offsets = [0]
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return np.asarray(offsets, dtype=np.uint32), np.frombuffer(bytes(blob), dtype=np.uint8)
+
+
+def write_segment_store(path: str, items, index: TranscriptIndex = None, srt_path: str = None):
+    """
+    [(start, end, text), ...] (va ixtiyoriy teskari indeks) -> ustunli binar fayl:
+    starts/ends float64, matn chegaralari uint32 + bitta UTF-8 blob;
+    indeks: saralangan lug'at, so'z -> segmentlar -> pozitsiyalar (CSR ko'rinishida).
+    srt_path berilsa, uning hajmi va mtime yoziladi - SRT o'zgarsa fayl eskirgan hisoblanadi.
+    """
+    arrays = {
+        "starts": np.asarray([float(st) for st, _en, _txt in items], dtype=np.float64),
+        "ends": np.asarray([float(en) for _st, en, _txt in items], dtype=np.float64),
+    }
+    arrays["text_offsets"], arrays["text_blob"] = _pack_strings(txt for _st, _en, txt in items)
+
+    vocab = sorted(index.postings) if index is not None else []
+    post_ptr, post_seg, pos_ptr, positions = [0], [], [0], []
+    for tok in vocab:
+        for seg_id, pos in sorted(index.postings[tok].items()):
+            post_seg.append(seg_id)
+            positions.extend(pos)
+            pos_ptr.append(len(positions))
+        post_ptr.append(len(post_seg))
+    arrays["vocab_offsets"], arrays["vocab_blob"] = _pack_strings(vocab)
+    arrays["post_ptr"] = np.asarray(post_ptr, dtype=np.uint32)
+    arrays["post_seg"] = np.asarray(post_seg, dtype=np.uint32)
+    arrays["pos_ptr"] = np.asarray(pos_ptr, dtype=np.uint32)
+    arrays["positions"] = np.asarray(positions, dtype=np.uint32)
+
+    srt_size, srt_mtime = 0, 0
+    if srt_path:
+        st = os.stat(srt_path)
+        srt_size, srt_mtime = st.st_size, st.st_mtime_ns
+
+    table = []
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    for name in SECTIONS:
+        offset += -offset % ALIGN
+        table.append((offset, arrays[name].nbytes))
+        offset += arrays[name].nbytes
+
+    # yarim yozilgan fayl ochilmasligi uchun avval vaqtinchalik faylga
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(arrays["starts"]), len(vocab), srt_size, srt_mtime))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for name, (start, _nbytes) in zip(SECTIONS, table):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(arrays[name].tobytes())
+    os.replace(tmp, path)
+
+
+class MappedPostings(Mapping):
+    """
+    TranscriptIndex.postings o'rniga: so'z -> {segment_id: [pozitsiyalar]},
+    faqat so'ralgan so'zlar fayldan o'qiladi (va eslab qolinadi).
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self.vocab = store.vocab
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __iter__(self):
+        return iter(self.vocab)
+
+    def __contains__(self, tok):
+        i = bisect_left(self.vocab, tok)
+        return i < len(self.vocab) and self.vocab[i] == tok
+
+    def __getitem__(self, tok):
+        found = self._decoded.get(tok)
+        if found is not None:
+            return found
+        i = bisect_left(self.vocab, tok)
+        if i >= len(self.vocab) or self.vocab[i] != tok:
+            raise KeyError(tok)
+        s = self._store
+        lo, hi = int(s.post_ptr[i]), int(s.post_ptr[i + 1])
+        bounds = s.pos_ptr[lo:hi + 1].tolist()
+        positions = s.positions[bounds[0]:bounds[-1]].tolist()
+        base = bounds[0]
+        found = {
+            seg_id: positions[bounds[k] - base:bounds[k + 1] - base]
+            for k, seg_id in enumerate(s.post_seg[lo:hi].tolist())
+        }
+        self._decoded[tok] = found
+        return found
+
+
+class SegmentStore(Sequence):
+    """
+    mmap orqali ochilgan transkript: store[i] -> (start, end, text), xuddi
+    load_srt_items ro'yxati kabi. Fayl to'liq o'qilmaydi - xotira faqat
+    tegilgan sahifalar hisobiga o'sadi, 10 soatlik transkript ham darhol ochiladi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, n_tokens, self.srt_size, self.srt_mtime = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"segment fayli formati noto'g'ri: {path}")
+        for k, name in enumerate(SECTIONS):
+            start, nbytes = SECTION.unpack_from(self._mm, HEADER.size + k * SECTION.size)
+            dtype = np.dtype(DTYPES[name])
+            setattr(self, name, np.frombuffer(self._mm, dtype=dtype, count=nbytes // dtype.itemsize, offset=start))
+        if len(self.starts) != n or len(self.vocab_offsets) != n_tokens + 1:
+            raise ValueError(f"segment fayli buzilgan: {path}")
+        self._vocab = None
+
+    def is_current(self, srt_path: str) -> bool:
+        try:
+            st = os.stat(srt_path)
+        except OSError:
+            return False
+        return st.st_size == self.srt_size and st.st_mtime_ns == self.srt_mtime
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, i: int) -> str:
+        a, b = int(self.text_offsets[i]), int(self.text_offsets[i + 1])
+        return self.text_blob[a:b].tobytes().decode("utf-8", errors="replace")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return (float(self.starts[i]), float(self.ends[i]), self.text_at(i))
+
+    def __iter__(self):
+        offsets = self.text_offsets.tolist()
+        blob = self.text_blob
+        for i, (st, en) in enumerate(zip(self.starts.tolist(), self.ends.tolist())):
+            yield st, en, blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8", errors="replace")
+
+    @property
+    def has_index(self) -> bool:
+        return len(self.vocab_offsets) > 1
+
+    @property
+    def vocab(self):
+        if self._vocab is None:
+            offsets = self.vocab_offsets.tolist()
+            blob = self.vocab_blob.tobytes()
+            self._vocab = [blob[offsets[k]:offsets[k + 1]].decode("utf-8") for k in range(len(offsets) - 1)]
+        return self._vocab
+
+    def search_index(self) -> TranscriptIndex:
+        return TranscriptIndex.from_postings(MappedPostings(self), len(self))
+
+
+def load_transcript(srt_path: str, with_index: bool = True):
+    """
+    SRT -> (segmentlar, TranscriptIndex yoki None). Yonida SRT bilan mos
+    .segments.bin bo'lsa mmap orqali ochiladi (SRT parse qilinmaydi, indeks
+    qayta qurilmaydi), aks holda SRT o'qiladi va binar fayl keyingi safar uchun yoziladi.
+    """
+    path = segments_path_for(srt_path)
+    if os.path.exists(path):
+        try:
+            store = SegmentStore(path)
+            if store.is_current(srt_path):
+                if not with_index:
+                    return store, None
+                index = store.search_index() if store.has_index else TranscriptIndex.from_items(store)
+                return store, index
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: Segment store error: {e}")
+
+    # pipeline bu modulni import qilmaydi, lekin og'irroq (srt, ffmpeg) - faqat kerak bo'lganda
+    from pipeline import load_srt_items
+    items = load_srt_items(srt_path)
+    index = TranscriptIndex.from_items(items)
+    try:
+        write_segment_store(path, items, index, srt_path)
+    except OSError as e:
+        # faqat o'qiladigan papka yoki fayl band (Windows) - keyingi safar yana SRT dan
+        print(f"DEBUG: Segment store write error: {e}")
+    return items, index if with_index else None
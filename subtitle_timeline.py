@@ -0,0 +1,75 @@
+import math
+from bisect import bisect_right
+
+
+class SubtitleTimeline:
+    """
+    Boshlanish vaqti bo'yicha saralangan segmentlar ustida interval indeks.
+    lookup(t) joriy segment indeksini (yoki -1) qaytaradi. Javob o'zgarmaydigan
+    [lo, hi) oraliq eslab qolinadi, shuning uchun video oldinga ketayotganda
+    ko'p chaqiruvlar O(1), sakrashda esa bisect O(log n).
+    """
+
+    def __init__(self, items=()):
+        if hasattr(items, "starts") and (items.starts[1:] >= items.starts[:-1]).all():
+            # segment_store.SegmentStore: saralangan ustunlar ustida to'g'ridan-to'g'ri bisect,
+            # ro'yxatga ko'chirilmaydi (append() da birinchi marta ko'chiriladi)
+            self.starts, self.ends = items.starts, items.ends
+            self.ids = range(len(items.starts))
+        else:
+            starts = [float(it[0]) for it in items]
+            ends = [float(it[1]) for it in items]
+            order = sorted(range(len(starts)), key=starts.__getitem__)
+            self.starts = [starts[i] for i in order]
+            self.ends = [ends[i] for i in order]
+            self.ids = order
+        self._reset_cursor()
+
+    def _reset_cursor(self):
+        self._lo = math.inf
+        self._hi = -math.inf
+        self._active = -1
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, start: float, end: float, item_id: int = None):
+        """
+        Transkripsiya davomida yangi segment qo'shish (odatda oxiriga).
+        """
+        if not isinstance(self.ids, list):
+            self.starts, self.ends, self.ids = self.starts.tolist(), self.ends.tolist(), list(self.ids)
+        if item_id is None:
+            item_id = len(self.ids)
+        k = bisect_right(self.starts, float(start))
+        self.starts.insert(k, float(start))
+        self.ends.insert(k, float(end))
+        self.ids.insert(k, item_id)
+        self._reset_cursor()
+
+    def lookup(self, t: float) -> int:
+        if self._lo <= t < self._hi:
+            return self._active
+
+        n = len(self.starts)
+        k = bisect_right(self.starts, t) - 1
+        next_start = self.starts[k + 1] if k + 1 < n else math.inf
+        if k < 0:
+            # birinchi segmentdan oldin
+            self._lo, self._hi, self._active = -math.inf, next_start, -1
+        elif t <= self.ends[k]:
+            self._lo, self._hi, self._active = self.starts[k], min(self.ends[k], next_start), self.ids[k]
+            if self._hi <= self._lo:
+                # nol uzunlikdagi segment: keshlamaymiz
+                self._lo, self._hi = math.inf, -math.inf
+                return self.ids[k]
+        else:
+            # ikki segment orasidagi bo'shliq
+            self._lo, self._hi, self._active = math.nextafter(self.ends[k], math.inf), next_start, -1
+        return self._active
+
+    def next_boundary(self) -> float:
+        """
+        Joriy javob o'zgaradigan keyingi vaqt (soniya).
+        """
+        return self._hi
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import shutil
+import threading
+
+
+DEFAULT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", ".transcript_cache")
+DEFAULT_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MB", "512"))
+SAMPLE_BYTES = 1 << 20  # fayl boshi, o'rtasi va oxiridan 1 MB dan
+
+
+def fast_file_hash(path: str, sample_bytes: int = SAMPLE_BYTES) -> str:
+    """
+    Katta video uchun tezkor kontent-xesh: fayl hajmi + boshi/o'rtasi/oxiridan
+    namunalar. Fayl nomi xeshga kirmaydi, shuning uchun nomi o'zgargan yoki
+    nusxalangan fayl ham bir xil kalit beradi.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if size <= 3 * sample_bytes:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2 - sample_bytes // 2, size - sample_bytes):
+                f.seek(offset)
+                h.update(f.read(sample_bytes))
+    return h.hexdigest()
+
+
+def transcript_key(media_hash: str, provider: str, model: str = "", language: str = "auto", refine: str = "none") -> str:
+    raw = "|".join([media_hash, provider or "", model or "", language or "auto", refine or "none"])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Tayyor SRT larni kontent-xesh + sozlamalar kaliti bo'yicha saqlovchi kesh.
+    So'z vaqtlari (.words.npz) bo'lsa, SRT bilan birga saqlanadi.
+    Hajm chegarasidan oshsa eng uzoq ishlatilmagan fayllar o'chiriladi.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: int = DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hash_memo = {}  # (path, size, mtime) -> hash
+
+    def media_hash(self, path: str) -> str:
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        h = self._hash_memo.get(memo_key)
+        if h is None:
+            h = fast_file_hash(path)
+            self._hash_memo[memo_key] = h
+        return h
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".srt")
+
+    def _words_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".words.npz")
+
+    def get(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                os.utime(path)  # LRU uchun oxirgi ishlatilgan vaqt
+                return path
+            self.misses += 1
+            return None
+
+    def get_words(self, key: str):
+        path = self._words_path(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, srt_path: str, words_path: str = None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # avval so'z vaqtlari: SRT paydo bo'lganda yozuv to'liq bo'ladi
+        cached_words = self._words_path(key)
+        if words_path and os.path.exists(words_path):
+            shutil.copyfile(words_path, cached_words + ".tmp")
+            os.replace(cached_words + ".tmp", cached_words)
+        elif os.path.exists(cached_words):
+            os.remove(cached_words)
+        tmp = path + ".tmp"
+        shutil.copyfile(srt_path, tmp)
+        os.replace(tmp, path)
+        with self._lock:
+            self._evict()
+        return path
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".srt"):
+                continue
+            p = os.path.join(self.cache_dir, name)
+            words = p[:-len(".srt")] + ".words.npz"
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            size = st.st_size + (os.path.getsize(words) if os.path.exists(words) else 0)
+            entries.append((st.st_mtime, size, p, words))
+            total += size
+        entries.sort()
+        # eng yangisi har doim qoladi
+        for mtime, size, p, words in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+                if os.path.exists(words):
+                    os.remove(words)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total) if total else 0.0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": rate}
@@ -0,0 +1,278 @@
+"""
+Barcha videolar transkriptlari bo'yicha umumiy qidiruv (SQLite FTS5).
+Har bir tayyor SRT segmentlari (matn, boshlanish/tugash, video yo'li) bazaga
+yoziladi; bitta so'rov butun arxivdan (video, vaqt) natijalarini reyting
+bo'yicha millisekundlarda qaytaradi.
+
+    python transcript_library.py --scan downloads "o'zbekiston tarixi"
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from progress import sec_to_hhmmss
+from search_index import tokenize
+from uz_normalize import normalize_uz
+
+
+LIBRARY_PATH = os.getenv("TRANSCRIPT_LIBRARY_PATH", ".transcript_library.sqlite3")
+LIBRARY_DIR = os.getenv("TRANSCRIPT_LIBRARY_DIR", "downloads")
+SEARCH_LIMIT = 200
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".mov", ".avi")
+AUDIO_EXTENSIONS = (".m4a", ".mp3", ".opus", ".ogg", ".wav", ".flac")
+
+Hit = namedtuple("Hit", ["video_path", "srt_path", "start", "end", "text", "score"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY,
+    srt_path TEXT UNIQUE NOT NULL,
+    video_path TEXT NOT NULL,
+    srt_mtime REAL NOT NULL,
+    segments INTEGER NOT NULL,
+    added REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    video_id INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    text TEXT NOT NULL,
+    norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_video ON segments(video_id);
+"""
+# norm ustuni segments jadvalidan olinadi (matn ikki marta saqlanmaydi);
+# apostrof so'z ichida qoladi (o'zbek, g'isht), 2-3 harfli prefikslar uchun alohida indeks
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    norm, content='segments', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 0 tokenchars ''''", prefix='2 3'
+);
+"""
+
+
+def find_media_for(srt_path: str, fallback: str = ""):
+    """
+    SRT yonidagi video (bo'lmasa audio) fayl: video.srt -> video.mp4,
+    YouTube uchun base.srt -> base.mp4 yoki base.audio.m4a.
+    """
+    base = os.path.splitext(srt_path)[0]
+    for ext in VIDEO_EXTENSIONS:
+        if os.path.exists(base + ext):
+            return base + ext
+    for ext in AUDIO_EXTENSIONS:
+        for path in (base + ".audio" + ext, base + ext):
+            if os.path.exists(path):
+                return path
+    return fallback
+
+
+def fts_query(query: str, mode: str = "contains"):
+    """
+    Foydalanuvchi so'rovi -> FTS5 MATCH ifodasi.
+    contains: barcha so'zlar prefiks bo'yicha (kitob -> kitoblar), exact: aniq ibora.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    if mode == "exact":
+        return '"' + " ".join(tokens) + '"'
+    return " AND ".join(f'"{tok}"*' for tok in tokens)
+
+
+class TranscriptLibrary:
+    """
+    Transkriptlar arxivi. Kalit - SRT yo'li: SRT o'zgarsa (mtime) qayta yoziladi,
+    o'zgarmagan bo'lsa scan() uni o'tkazib yuboradi. FTS5 yo'q SQLite da
+    sekinroq LIKE qidiruviga o'tiladi.
+    """
+
+    def __init__(self, path: str = LIBRARY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"DEBUG: FTS5 yo'q, oddiy qidiruv ishlatiladi: {e}")
+            self.fts = False
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- yozish ----------
+    def _delete_video(self, video_id: int):
+        if self.fts:
+            # tashqi kontentli FTS jadvalidan eski qiymatlar bilan o'chiriladi
+            self._conn.execute(
+                "INSERT INTO segments_fts (segments_fts, rowid, norm) "
+                "SELECT 'delete', id, norm FROM segments WHERE video_id=?", (video_id,)
+            )
+        self._conn.execute("DELETE FROM segments WHERE video_id=?", (video_id,))
+        self._conn.execute("DELETE FROM videos WHERE id=?", (video_id,))
+
+    def add(self, srt_path: str, items, video_path: str = None):
+        """
+        Bitta transkriptni qo'shish (mavjud bo'lsa almashtiriladi).
+        items: [(start, end, text), ...]
+        """
+        srt_path = os.path.abspath(srt_path)
+        video_path = os.path.abspath(video_path) if video_path else find_media_for(srt_path, "")
+        mtime = os.path.getmtime(srt_path) if os.path.exists(srt_path) else 0.0
+        rows = [(float(st), float(en), txt, normalize_uz(txt)) for st, en, txt in items if txt]
+        with self._lock:
+            old = self._conn.execute("SELECT id FROM videos WHERE srt_path=?", (srt_path,)).fetchone()
+            if old:
+                self._delete_video(old[0])
+            cur = self._conn.execute(
+                "INSERT INTO videos (srt_path, video_path, srt_mtime, segments, added) VALUES (?, ?, ?, ?, ?)",
+                (srt_path, video_path, mtime, len(rows), time.time()),
+            )
+            video_id = cur.lastrowid
+            self._conn.executemany(
+                "INSERT INTO segments (video_id, start, end, text, norm) VALUES (?, ?, ?, ?, ?)",
+                [(video_id,) + row for row in rows],
+            )
+            if self.fts:
+                self._conn.execute(
+                    "INSERT INTO segments_fts (rowid, norm) SELECT id, norm FROM segments WHERE video_id=?",
+                    (video_id,),
+                )
+            self._conn.commit()
+        return len(rows)
+
+    def add_srt(self, srt_path: str, video_path: str = None, force: bool = False) -> bool:
+        """
+        SRT faylni qo'shish; o'zgarmagan bo'lsa (mtime bir xil) hech narsa qilinmaydi.
+        """
+        if not force and self.is_current(srt_path):
+            return False
+        # pipeline import qilinganda bu modul ham yuklanadi - aylana importdan qochish uchun shu yerda
+        from pipeline import load_srt_items
+        self.add(srt_path, load_srt_items(srt_path), video_path)
+        return True
+
+    def is_current(self, srt_path: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT srt_mtime FROM videos WHERE srt_path=?", (os.path.abspath(srt_path),)
+            ).fetchone()
+        return row is not None and os.path.exists(srt_path) and row[0] == os.path.getmtime(srt_path)
+
+    def remove(self, srt_path: str):
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM videos WHERE srt_path=?", (os.path.abspath(srt_path),)).fetchone()
+            if row:
+                self._delete_video(row[0])
+                self._conn.commit()
+
+    def scan(self, root: str = LIBRARY_DIR, on_progress=None):
+        """
+        Papkadagi barcha SRT larni arxivga qo'shish (yangi/o'zgarganlari),
+        o'chirilgan SRT lar arxivdan olib tashlanadi.
+        Natija: (qo'shilgan, o'chirilgan)
+        """
+        found = set()
+        added = 0
+        for dirpath, _dirs, files in os.walk(root):
+            for name in sorted(files):
+                if not name.lower().endswith(".srt"):
+                    continue
+                path = os.path.join(dirpath, name)
+                found.add(os.path.abspath(path))
+                try:
+                    if self.add_srt(path):
+                        added += 1
+                except Exception as e:
+                    print(f"DEBUG: Library ingest error ({path}): {e}")
+                if on_progress:
+                    on_progress(len(found), added)
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self._lock:
+            known = [p for (p,) in self._conn.execute("SELECT srt_path FROM videos") if p.startswith(prefix)]
+        stale = [p for p in known if p not in found]
+        for path in stale:
+            self.remove(path)
+        return added, len(stale)
+
+    # ---------- qidiruv ----------
+    def search(self, query: str, mode: str = "contains", limit: int = SEARCH_LIMIT):
+        """
+        Butun arxiv bo'yicha qidiruv: [Hit(video_path, srt_path, start, end, text, score), ...],
+        eng mosi birinchi (BM25). mode: "contains" yoki "exact"
+        ("fuzzy" arxivda "contains" kabi ishlaydi).
+        """
+        if self.fts:
+            match = fts_query(query, mode)
+            if match is None:
+                return []
+            # avval faqat FTS ichida saralanadi, jadvallar faqat LIMIT ta natija uchun birlashtiriladi
+            sql = (
+                "SELECT v.video_path, v.srt_path, s.start, s.end, s.text, f.rank FROM ("
+                "SELECT rowid, rank FROM segments_fts WHERE segments_fts MATCH ? ORDER BY rank LIMIT ?"
+                ") f JOIN segments s ON s.id = f.rowid JOIN videos v ON v.id = s.video_id ORDER BY f.rank"
+            )
+            params = (match, limit)
+        else:
+            tokens = tokenize(query)
+            if not tokens:
+                return []
+            norm = " ".join(tokens)
+            where = "s.norm LIKE ?" if mode == "exact" else " AND ".join(["s.norm LIKE ?"] * len(tokens))
+            sql = (
+                "SELECT v.video_path, v.srt_path, s.start, s.end, s.text, 0.0 "
+                f"FROM segments s JOIN videos v ON v.id = s.video_id WHERE {where} ORDER BY v.id, s.start LIMIT ?"
+            )
+            likes = [f"%{norm}%"] if mode == "exact" else [f"%{tok}%" for tok in tokens]
+            params = (*likes, limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # bm25 qanchalik kichik bo'lsa, shunchalik mos - foydalanuvchiga musbat ball
+        return [Hit(video, srt_path, st, en, txt, -score or 0.0) for video, srt_path, st, en, txt, score in rows]
+
+    def stats(self):
+        with self._lock:
+            (videos,) = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()
+            (segments,) = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()
+        return {"videos": videos, "segments": segments, "fts": self.fts}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Transkriptlar arxivi bo'yicha qidiruv")
+    ap.add_argument("query", nargs="?", help="qidiruv so'rovi")
+    ap.add_argument("--scan", metavar="DIR", help="papkadagi SRT larni arxivga qo'shish")
+    ap.add_argument("--exact", action="store_true", help="aniq ibora")
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--db", default=LIBRARY_PATH)
+    args = ap.parse_args(argv)
+
+    library = TranscriptLibrary(args.db)
+    if args.scan:
+        t0 = time.perf_counter()
+        added, removed = library.scan(args.scan)
+        stats = library.stats()
+        print(f"Arxiv: +{added} / -{removed} transkript, jami {stats['videos']} video, "
+              f"{stats['segments']} segment ({time.perf_counter() - t0:.1f} s)")
+    if args.query:
+        t0 = time.perf_counter()
+        hits = library.search(args.query, mode="exact" if args.exact else "contains", limit=args.limit)
+        ms = (time.perf_counter() - t0) * 1000
+        for hit in hits:
+            name = os.path.basename(hit.video_path or hit.srt_path)
+            print(f"{hit.score:6.2f}  {name}  [{sec_to_hhmmss(hit.start)}]  {hit.text[:100]}")
+        print(f"{len(hits)} ta natija, {ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
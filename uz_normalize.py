@@ -0,0 +1,34 @@
+import re
+
+
+# O'zbek kirill -> lotin (2023 imlo qoidalari asosida, qidiruv uchun yetarli)
+CYR_TO_LAT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "'", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "ў": "o'", "қ": "q", "ғ": "g'", "ҳ": "h",
+}
+# o‘, g‘ uchun ishlatiladigan barcha apostrof ko'rinishlari -> '
+APOSTROPHES = "‘’ʻʼ`´ʹ′"
+
+_TRANSLATE = str.maketrans({**CYR_TO_LAT, **{ch: "'" for ch in APOSTROPHES}})
+
+# "е" so'z boshida va unlidan / ayirish belgisidan keyin "ye" o'qiladi (ер -> yer, поезд -> poyezd)
+_CYR_YE_RE = re.compile(r"(?:(?<![а-яёўқғҳ])|(?<=[аеёиоуэюяўъь]))е")
+# harf, raqam va so'z ichidagi apostrofdan boshqa hamma narsa - bo'shliq
+_PUNCT_RE = re.compile(r"[^\w']+|(?<!\w)'+|'+(?!\w)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_uz(text: str) -> str:
+    """
+    Qidiruv uchun yagona ko'rinish: kichik harf, kirill -> lotin,
+    apostrof variantlari -> ', tinish belgilari olib tashlanadi.
+    "Ўзбекистон", "O‘zbekiston" va "oʻzbekiston" bir xil natija beradi.
+    """
+    s = (text or "").lower()
+    s = _CYR_YE_RE.sub("ye", s)
+    s = s.translate(_TRANSLATE)
+    s = _PUNCT_RE.sub(" ", s)
+    return _SPACE_RE.sub(" ", s).strip()
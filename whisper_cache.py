@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+# Modellarning CPU (int8) dagi taxminiy xotira hajmi, MB
+MODEL_SIZE_MB = {
+    "tiny": 80,
+    "base": 150,
+    "small": 500,
+    "medium": 1500,
+    "large-v1": 3100,
+    "large-v2": 3100,
+    "large-v3": 3100,
+}
+DEFAULT_MODEL_SIZE_MB = 1500
+
+# Xotira chegarasi .env orqali o'zgartiriladi: WHISPER_CACHE_MB=4096
+DEFAULT_BUDGET_MB = int(os.getenv("WHISPER_CACHE_MB", "4096"))
+
+
+def estimate_model_mb(model_name: str, compute_type: str = "int8") -> int:
+    size = MODEL_SIZE_MB.get(model_name, DEFAULT_MODEL_SIZE_MB)
+    if compute_type not in ("int8", "int8_float16", "int8_float32", "int8_bfloat16"):
+        # float16/float32 og'irliklar int8 dan 2-4 barobar katta
+        size *= 2 if "16" in compute_type else 4
+    return size
+
+
+class WhisperModelCache:
+    """
+    Yuklangan WhisperModel larni saqlab turuvchi jarayon-miqyosidagi kesh.
+    Kalit: (model, device, compute_type, cpu_threads). Xotira chegarasidan
+    oshsa, eng uzoq ishlatilmagan (LRU) model chiqarib yuboriladi.
+    """
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()  # key -> (model, size_mb)
+        self._lock = threading.Lock()
+        self._key_locks = {}  # bir xil modelni ikki marta yuklamaslik uchun
+
+    def get(self, model_name: str, device: str = "cpu", compute_type: str = "int8", cpu_threads: int = 0):
+        key = (model_name, device, compute_type, int(cpu_threads))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # boshqa thread shu vaqt ichida yuklab bo'lgan bo'lishi mumkin
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    return entry[0]
+                size_mb = estimate_model_mb(model_name, compute_type)
+                self._evict(size_mb)
+
+            # faster_whisper (ctranslate2) og'ir - faqat birinchi model kerak bo'lganda import qilinadi
+            from faster_whisper import WhisperModel
+            model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=int(cpu_threads))
+
+            with self._lock:
+                self._models[key] = (model, size_mb)
+                self._evict(0, keep=1)
+                self._key_locks.pop(key, None)
+            return model
+
+    def _evict(self, incoming_mb: int, keep: int = 0):
+        # self._lock ushlangan holda chaqiriladi
+        while len(self._models) > keep and self.used_mb() + incoming_mb > self.budget_mb:
+            self._models.popitem(last=False)
+
+    def used_mb(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def set_budget(self, budget_mb: int):
+        with self._lock:
+            self.budget_mb = budget_mb
+            self._evict(0, keep=1)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._models.keys())
+
+
+_default_cache = WhisperModelCache()
+
+
+def get_whisper_model(model_name: str, device: str = "cpu", compute_type: str = "int8", cpu_threads: int = 0):
+    return _default_cache.get(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def whisper_model_cache() -> WhisperModelCache:
+    return _default_cache
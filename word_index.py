@@ -0,0 +1,93 @@
+import os
+from array import array
+
+import numpy as np
+
+from search_index import tokenize
+
+
+# .env orqali yoqiladi: WHISPER_WORD_TIMESTAMPS=1
+WORD_TIMESTAMPS = os.getenv("WHISPER_WORD_TIMESTAMPS", "0") == "1"
+
+
+def words_path_for(srt_path: str) -> str:
+    return os.path.splitext(srt_path)[0] + ".words.npz"
+
+
+class WordIndex:
+    """
+    So'z darajasidagi vaqtlar uchun ixcham ustunli saqlash:
+    starts/ends - float32, offsets - bitta UTF-8 blob ichidagi so'z chegaralari,
+    seg_first - har bir segmentning birinchi so'zi indeksi.
+    Bir so'z ~15-20 bayt egallaydi, 10 soatlik arxiv ham bir necha o'n MB.
+    """
+
+    def __init__(self, starts=None, ends=None, offsets=None, blob=b"", seg_first=None):
+        self.starts = starts if starts is not None else array("f")
+        self.ends = ends if ends is not None else array("f")
+        self.offsets = offsets if offsets is not None else array("I", [0])
+        self.blob = blob if blob else bytearray()
+        self.seg_first = seg_first if seg_first is not None else array("I", [0])
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def n_segments(self):
+        return len(self.seg_first) - 1
+
+    def add_segment(self, words):
+        """
+        Bitta segment so'zlarini qo'shish (faster_whisper Word: .start, .end, .word).
+        """
+        for w in words or ():
+            text = (w.word or "").strip()
+            if not text:
+                continue
+            self.starts.append(float(w.start))
+            self.ends.append(float(w.end))
+            self.blob += text.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        self.seg_first.append(len(self.starts))
+
+    def word(self, i: int) -> str:
+        return bytes(self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]).decode("utf-8", errors="replace")
+
+    def find_word_time(self, seg_id: int, query: str, mode: str = "contains"):
+        """
+        Segment ichida so'rov boshlangan so'zning aniq vaqti (topilmasa None).
+        """
+        tokens = tokenize(query)
+        if not tokens or not (0 <= seg_id < self.n_segments):
+            return None
+        lo, hi = int(self.seg_first[seg_id]), int(self.seg_first[seg_id + 1])
+        words = [(tokenize(self.word(i)) or [""])[0] for i in range(lo, hi)]
+        for j in range(len(words)):
+            if mode == "exact":
+                ok = words[j:j + len(tokens)] == tokens
+            else:
+                ok = all(j + k < len(words) and words[j + k].startswith(tok) for k, tok in enumerate(tokens))
+            if ok:
+                return float(self.starts[lo + j])
+        return None
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            starts=np.asarray(self.starts, dtype=np.float32),
+            ends=np.asarray(self.ends, dtype=np.float32),
+            offsets=np.asarray(self.offsets, dtype=np.uint32),
+            blob=np.frombuffer(bytes(self.blob), dtype=np.uint8),
+            seg_first=np.asarray(self.seg_first, dtype=np.uint32),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls(
+                starts=data["starts"],
+                ends=data["ends"],
+                offsets=data["offsets"],
+                blob=data["blob"].tobytes(),
+                seg_first=data["seg_first"],
+            )
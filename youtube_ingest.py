@@ -0,0 +1,93 @@
+import copy
+import os
+import threading
+
+
+DOWNLOAD_DIR = "downloads"
+VIDEO_FORMAT = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+AUDIO_FORMAT = "bestaudio[ext=m4a]/bestaudio/best"
+VIDEO_OUTTMPL = "%(title)s.%(ext)s"
+AUDIO_OUTTMPL = "%(title)s.audio.%(ext)s"
+
+
+def _downloaded_path(ydl, result):
+    # birlashtirilgan (merge) fayl yo'li requested_downloads da bo'ladi
+    downloads = result.get("requested_downloads") or []
+    if downloads and downloads[-1].get("filepath"):
+        return downloads[-1]["filepath"]
+    return ydl.prepare_filename(result)
+
+
+def _yt_dlp():
+    # yt_dlp faqat URL yuklanganda kerak, dastur ochilishida import qilinmaydi
+    import yt_dlp
+    return yt_dlp
+
+
+def extract_info(url: str):
+    yt_dlp = _yt_dlp()
+    with yt_dlp.YoutubeDL({"quiet": True, "noplaylist": True}) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def download_format(info, fmt: str, outtmpl: str, progress_hooks=None) -> str:
+    """
+    Oldindan olingan info bo'yicha bitta formatni yuklash (sahifa qayta so'ralmaydi).
+    """
+    yt_dlp = _yt_dlp()
+    opts = {"format": fmt, "outtmpl": outtmpl, "quiet": True, "noplaylist": True}
+    if progress_hooks:
+        opts["progress_hooks"] = progress_hooks
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+        return _downloaded_path(ydl, result)
+
+
+def video_base_path(info, out_dir: str = DOWNLOAD_DIR) -> str:
+    """
+    Video fayl yo'li kengaytmasiz (SRT va boshqa yon fayllar uchun).
+    """
+    yt_dlp = _yt_dlp()
+    with yt_dlp.YoutubeDL({"outtmpl": os.path.join(out_dir, VIDEO_OUTTMPL), "quiet": True}) as ydl:
+        return os.path.splitext(ydl.prepare_filename(info))[0]
+
+
+def download_audio(url: str, out_dir: str = DOWNLOAD_DIR, progress_hooks=None):
+    """
+    Faqat audio oqimi (GUI'siz ishlash uchun video kerak emas).
+    Natija: (audio_path, base_path)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    info = extract_info(url)
+    audio_path = download_format(info, AUDIO_FORMAT, os.path.join(out_dir, AUDIO_OUTTMPL), progress_hooks)
+    return audio_path, video_base_path(info, out_dir)
+
+
+def download_audio_first(url: str, on_video=None, on_video_error=None, out_dir: str = DOWNLOAD_DIR,
+                         audio_hooks=None, video_hooks=None):
+    """
+    Avval faqat audio oqimi (bestaudio) yuklanadi va darhol qaytariladi -
+    transkripsiya shu fayldan boshlanadi. Video (ijro uchun) parallel ravishda
+    fon threadda yuklanadi, tugagach on_video(video_path) chaqiriladi.
+    audio_hooks/video_hooks - yt_dlp progress_hooks (progress.ytdlp_hook).
+    Natija: (audio_path, base_path, video_thread)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    info = extract_info(url)
+    base_path = video_base_path(info, out_dir)
+
+    def _video():
+        try:
+            path = download_format(info, VIDEO_FORMAT, os.path.join(out_dir, VIDEO_OUTTMPL), video_hooks)
+            if on_video:
+                on_video(path)
+        except Exception as e:
+            print(f"DEBUG: video download error: {e}")
+            if on_video_error:
+                on_video_error(e)
+
+    video_thread = threading.Thread(target=_video, daemon=True)
+    video_thread.start()
+
+    audio_path = download_format(info, AUDIO_FORMAT, os.path.join(out_dir, AUDIO_OUTTMPL), audio_hooks)
+    return audio_path, base_path, video_thread